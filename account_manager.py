@@ -1,51 +1,112 @@
 import json
 import os
+import sqlite3
 
-ACCOUNTS_FILE = "accounts.json"
+ACCOUNTS_DB = "accounts.db"
+ACCOUNTS_FILE = "accounts.json" # Old format, imported once when the database is created
 
 class AccountManager:
-    def __init__(self):
-        self.accounts = self.load_accounts()
+    """Accounts stored in SQLite.
+
+    Nothing is read until the first query, lookups go through the primary
+    key, and the selection screen pages through the table instead of loading
+    every name. WAL mode plus a busy timeout lets several game processes on
+    the same machine write highscores at the same time.
+    """
+
+    def __init__(self, path=ACCOUNTS_DB):
+        self.path = path
+        self.connection = None
         self.current_account = None
+        self.version = 0 # Bumped whenever the account list changes
 
-    def load_accounts(self):
-        if not os.path.exists(ACCOUNTS_FILE):
-            return {}
-        with open(ACCOUNTS_FILE, 'r') as f:
+    def connect(self):
+        if self.connection is None:
+            is_new = not os.path.exists(self.path)
+            self.connection = sqlite3.connect(self.path, timeout=5.0)
+            self.connection.row_factory = sqlite3.Row
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute(
+                "CREATE TABLE IF NOT EXISTS accounts ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, "
+                "name TEXT NOT NULL UNIQUE, "
+                "highscore INTEGER NOT NULL DEFAULT 0, "
+                "save_file TEXT NOT NULL)"
+            )
+            if is_new:
+                self.import_json(ACCOUNTS_FILE)
+        return self.connection
+
+    def import_json(self, path):
+        if not os.path.exists(path):
+            return
+        with open(path, 'r') as f:
             try:
-                return json.load(f)
+                accounts = json.load(f)
             except json.JSONDecodeError:
-                return {}
-
-    def save_accounts(self):
-        with open(ACCOUNTS_FILE, 'w') as f:
-            json.dump(self.accounts, f, indent=4)
+                return
+        with self.connection:
+            for name, data in accounts.items():
+                self.connection.execute(
+                    "INSERT OR IGNORE INTO accounts (name, highscore, save_file) VALUES (?, ?, ?)",
+                    (name, data.get("highscore", 0), data.get("save_file", f"save_{name}.json")),
+                )
 
     def create_account(self, name):
-        if name in self.accounts:
+        connection = self.connect()
+        with connection:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO accounts (name, save_file) VALUES (?, ?)",
+                (name, f"save_{name}.json"),
+            )
+        if cursor.rowcount == 0:
             return False # Account already exists
-        
-        account_id = len(self.accounts) + 1
-        self.accounts[name] = {
-            "id": account_id,
-            "highscore": 0,
-            "save_file": f"save_{name}.json"
-        }
-        self.save_accounts()
+        self.version += 1
         return True
 
     def get_account(self, name):
-        return self.accounts.get(name)
+        row = self.connect().execute("SELECT * FROM accounts WHERE name = ?", (name,)).fetchone()
+        return dict(row) if row else None
+
+    def count_accounts(self, search=""):
+        query, params = self._search_clause(search)
+        return self.connect().execute("SELECT COUNT(*) FROM accounts" + query, params).fetchone()[0]
+
+    def list_accounts(self, offset=0, limit=None, search=""):
+        query, params = self._search_clause(search)
+        rows = self.connect().execute(
+            "SELECT name FROM accounts" + query + " ORDER BY id LIMIT ? OFFSET ?",
+            params + (-1 if limit is None else limit, offset),
+        )
+        return [row["name"] for row in rows]
+
+    @staticmethod
+    def _search_clause(search):
+        if not search:
+            return "", ()
+        pattern = search.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        return " WHERE name LIKE ? ESCAPE '\\'", (f"%{pattern}%",)
+
+    def save_highscore(self, highscore):
+        if not self.current_account:
+            return
+        connection = self.connect()
+        with connection:
+            # MAX keeps the best score if another process wrote one meanwhile
+            connection.execute(
+                "UPDATE accounts SET highscore = MAX(highscore, ?) WHERE name = ?",
+                (highscore, self.current_account),
+            )
 
     def set_current_account(self, name):
-        if name in self.accounts:
+        if self.get_account(name):
             self.current_account = name
             return True
         return False
 
     def get_current_account_data(self):
         if self.current_account:
-            return self.accounts[self.current_account]
+            return self.get_account(self.current_account)
         return None
 
 account_manager = AccountManager()
@@ -0,0 +1,66 @@
+import pygame
+
+
+class AssetCache:
+    """Shared entity surfaces keyed by (kind, size, color, variant).
+
+    Every instance of an entity type looks the same, so they all get the same
+    surface. Surfaces are converted to the display format once a window
+    exists, which makes blitting them much cheaper. Frames cut from a sprite
+    sheet are stored under the same kind of key with the frame index as the
+    variant.
+    """
+
+    def __init__(self):
+        self.surfaces = {}
+        self.sheets = {}
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def get_surface(self, kind, size, color, variant=None):
+        key = (kind, tuple(size), color, variant)
+        surface = self.surfaces.get(key)
+        if surface is None:
+            has_alpha = color is not None and len(color) == 4
+            surface = pygame.Surface(size, pygame.SRCALPHA if has_alpha else 0)
+            if color is not None:
+                surface.fill(color)
+            surface = self._prepare(surface, has_alpha)
+            self.surfaces[key] = surface
+        return surface
+
+    def load_sheet(self, kind, path, frame_size):
+        """Cut a sprite sheet into frames, left to right and top to bottom."""
+        key = (kind, path, tuple(frame_size))
+        if key in self.sheets:
+            return self.sheets[key]
+
+        sheet = self._prepare(pygame.image.load(path), True)
+        w, h = frame_size
+        frames = []
+        for y in range(0, sheet.get_height() - h + 1, h):
+            for x in range(0, sheet.get_width() - w + 1, w):
+                frame = sheet.subsurface((x, y, w, h))
+                self.surfaces[(kind, (w, h), None, len(frames))] = frame
+                frames.append(frame)
+        self.sheets[key] = frames
+        return frames
+
+    def convert_all(self):
+        # Surfaces made before the window was opened keep the wrong pixel format
+        for key, surface in self.surfaces.items():
+            self.surfaces[key] = self._prepare(surface, surface.get_flags() & pygame.SRCALPHA)
+
+    def clear(self):
+        self.surfaces.clear()
+        self.sheets.clear()
+
+    @staticmethod
+    def _prepare(surface, has_alpha):
+        if pygame.display.get_init() and pygame.display.get_surface() is not None:
+            return surface.convert_alpha() if has_alpha else surface.convert()
+        return surface
+
+
+asset_cache = AssetCache()
@@ -0,0 +1,145 @@
+import argparse
+import csv
+import itertools
+import multiprocessing
+import os
+import statistics
+import time
+from collections import Counter
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from constants import *
+from simulation import run_headless
+
+# Upgrade buttons to buy, in order, whenever a level is cleared
+POLICIES = {
+    "none": (),
+    "speed": ("移动速度",),
+    "attack": ("攻击速度",),
+    "health": ("最大生命",),
+    "spread": ("散射",),
+    "dash": ("购买冲刺次数",),
+    "balanced": ("攻击速度", "散射", "最大生命", "移动速度"),
+}
+
+_game = None # One headless Game per worker process, reused for every run
+
+
+def _init_worker():
+    global _game
+    from main import Game
+    _game = Game(headless=True)
+
+
+def spend_points(game, order):
+    """Buy upgrades round-robin from `order` until none is affordable."""
+    buttons = [b for name in order for b in game.upgrade_buttons if b.text == name]
+    bought = True
+    while bought:
+        bought = False
+        for button in buttons:
+            if game.upgrade_points >= button.cost:
+                game.upgrade_points -= button.cost
+                button.callback(game)
+                bought = True
+
+
+def run_one(task):
+    mode, zen, policy, seed, ticks = task
+    game = _game
+    game.reset_game()
+    game.rng.seed(seed)
+    game.ticks = 0
+    game.tutorial_stage = 0
+    clear_times = []
+    level_start = 0
+
+    def on_upgrade(game):
+        nonlocal level_start
+        clear_times.append(game.ticks - level_start)
+        spend_points(game, POLICIES[policy])
+        game.start_new_level()
+        level_start = game.ticks
+
+    run_headless(mode, ticks, zen=zen, on_upgrade=on_upgrade, game=game)
+
+    if game.game_state == GAME_OVER:
+        killed_by = game.player.killed_by
+        outcome = f"killed by {type(killed_by).__name__}" if killed_by is not None else "killed"
+    elif game.game_state == GAME_WON:
+        outcome = "won"
+    else:
+        outcome = "timeout"
+    kills = game.player.kill_count
+    return {
+        "mode": mode,
+        "zen": zen,
+        "policy": policy,
+        "seed": seed,
+        "level": game.level,
+        "kills": kills,
+        "survived_s": game.ticks / 1000,
+        "clear_s": statistics.fmean(clear_times) / 1000 if clear_times else None,
+        "ttk_s": game.ticks / 1000 / kills if kills else None,
+        "outcome": outcome,
+    }
+
+
+def run_batch(tasks, workers=None, chunksize=4):
+    """Run every (mode, zen, policy, seed, ticks) task across a process pool."""
+    with multiprocessing.Pool(workers, initializer=_init_worker) as pool:
+        return list(pool.imap_unordered(run_one, tasks, chunksize))
+
+
+def _mean(values):
+    values = [v for v in values if v is not None]
+    return statistics.fmean(values) if values else float("nan")
+
+
+def summarize(results):
+    groups = {}
+    for row in results:
+        groups.setdefault((row["mode"], row["zen"], row["policy"]), []).append(row)
+
+    header = f"{'mode':<8} {'zen':<4} {'policy':<9} {'runs':>5} {'level':>6} {'max':>4} {'won':>5} {'clear_s':>8} {'ttk_s':>6}  outcomes"
+    lines = [header, "-" * len(header)]
+    for (mode, zen, policy), rows in sorted(groups.items()):
+        levels = [row["level"] for row in rows]
+        outcomes = Counter(row["outcome"] for row in rows)
+        won = outcomes["won"] / len(rows)
+        lines.append(
+            f"{mode:<8} {'yes' if zen else 'no':<4} {policy:<9} {len(rows):>5} {statistics.fmean(levels):>6.1f} "
+            f"{max(levels):>4} {won:>5.0%} {_mean(row['clear_s'] for row in rows):>8.1f} "
+            f"{_mean(row['ttk_s'] for row in rows):>6.2f}  "
+            + ", ".join(f"{name} {count}" for name, count in outcomes.most_common())
+        )
+    return "\n".join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run many headless games in parallel and tabulate the results.")
+    parser.add_argument("--runs", type=int, default=20, help="seeds per mode/zen/policy combination")
+    parser.add_argument("--modes", nargs="+", default=[NORMAL, ENDLESS], choices=[NORMAL, DUNGEON, ENDLESS])
+    parser.add_argument("--zen", choices=["off", "on", "both"], default="off")
+    parser.add_argument("--policies", nargs="+", default=list(POLICIES), choices=list(POLICIES))
+    parser.add_argument("--ticks", type=int, default=FPS * 600, help="tick limit per run")
+    parser.add_argument("--workers", type=int, default=None, help="defaults to the number of cores")
+    parser.add_argument("--csv", metavar="PATH", help="also write one row per run")
+    args = parser.parse_args()
+
+    zen_flags = {"off": [False], "on": [True], "both": [False, True]}[args.zen]
+    tasks = [(mode, zen, policy, seed, args.ticks)
+             for mode, zen, policy, seed in itertools.product(args.modes, zen_flags, args.policies, range(args.runs))]
+
+    start = time.perf_counter()
+    results = run_batch(tasks, args.workers)
+    elapsed = time.perf_counter() - start
+
+    print(summarize(results))
+    print(f"\n{len(results)} runs in {elapsed:.1f}s ({len(results) / elapsed:.1f} runs/s)")
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=list(results[0]))
+            writer.writeheader()
+            writer.writerows(sorted(results, key=lambda row: (row["mode"], row["zen"], row["policy"], row["seed"])))
@@ -0,0 +1,50 @@
+"""Per-tick cost of a large chasing horde in endless mode.
+
+Run from the repository root: python benchmarks/enemy_horde.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from constants import *
+from entities import Enemy
+from main import Game
+
+
+def measure(game, count, ticks=120):
+    game.reset_game()
+    game.start_new_game(ENDLESS)
+    for enemy in list(game.enemy_group):
+        enemy.kill()
+    for _ in range(count):
+        game.spawn_enemy(Enemy(game, game.player))
+    game.player.health = game.player.max_health = float("inf") # Keep the horde chasing
+    surface = pygame.Surface((WIDTH, HEIGHT))
+
+    update = draw = 0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        game.step(1 / FPS)
+        middle = time.perf_counter()
+        surface.fill(WHITE)
+        game.enemy_store.draw(surface)
+        game.all_sprites.draw(surface)
+        update += middle - start
+        draw += time.perf_counter() - middle
+    return update / ticks * 1000, draw / ticks * 1000
+
+
+def main():
+    game = Game(headless=True)
+    print(f"{'enemies':>8} {'update ms':>10} {'draw ms':>8}")
+    for count in (100, 1000, 5000, 10000):
+        update, draw = measure(game, count)
+        print(f"{count:>8} {update:>10.2f} {draw:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
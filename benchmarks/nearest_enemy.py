@@ -0,0 +1,52 @@
+"""Compare auto-aim target lookup cost against enemy count.
+
+Run from the repository root: python benchmarks/nearest_enemy.py
+"""
+import os
+import random
+import sys
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from constants import *
+from entities import Enemy
+from main import Game
+
+
+def spawn(game, count, rng):
+    game.reset_game()
+    game.start_new_game(ENDLESS)
+    for enemy in list(game.enemy_group):
+        enemy.kill()
+    margin = 50
+    for _ in range(count):
+        pos = pygame.math.Vector2(rng.uniform(-margin, WIDTH + margin), rng.uniform(-margin, HEIGHT + margin))
+        game.spawn_enemy(Enemy(game, game.player, pos))
+    return list(game.enemy_group)
+
+
+def main():
+    game = Game(headless=True, seed=0)
+    rng = random.Random(0)
+    queries = [pygame.math.Vector2(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT)) for _ in range(200)]
+
+    print(f"{'enemies':>8} {'linear us':>10} {'grid us':>10} {'speedup':>8}")
+    for count in (10, 100, 500, 1000, 5000, 10000):
+        enemies = spawn(game, count, rng)
+        grid = game.enemy_grid
+
+        for pos in queries[:20]:
+            expected = min(enemies, key=lambda enemy: pos.distance_to(enemy.pos))
+            assert pos.distance_to(grid.nearest(pos).pos) == pos.distance_to(expected.pos)
+
+        linear = timeit.timeit(lambda: [min(enemies, key=lambda enemy: pos.distance_to(enemy.pos)) for pos in queries], number=3)
+        indexed = timeit.timeit(lambda: [grid.nearest(pos) for pos in queries], number=3)
+        per_query = 1e6 / (3 * len(queries))
+        print(f"{count:>8} {linear * per_query:>10.1f} {indexed * per_query:>10.1f} {linear / indexed:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+"""Per-tick cost of wide spread shots as pooled sprites and as volleys.
+
+Run from the repository root: python benchmarks/spread_shots.py
+"""
+import os
+import sys
+import time
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from constants import *
+import entities
+from entities import Enemy
+from main import Game
+
+
+def measure(game, bullets, volleys, horde=500, ticks=300):
+    entities.VOLLEY_MIN_BULLETS = 3 if volleys else bullets + 1
+    game.reset_game()
+    game.start_new_game(ENDLESS)
+    for _ in range(horde):
+        game.spawn_enemy(Enemy(game, game.player))
+    player = game.player
+    player.health = player.max_health = float("inf")
+    player.projectile_count = bullets
+    player.attack_speed = 50
+    surface = pygame.Surface((WIDTH, HEIGHT))
+
+    update = draw = 0
+    for _ in range(ticks):
+        start = time.perf_counter()
+        game.step(SIM_STEP)
+        middle = time.perf_counter()
+        game.draw_sprites(surface)
+        update += middle - start
+        draw += time.perf_counter() - middle
+    return update * 1000 / ticks, draw * 1000 / ticks, game.bullet_count()
+
+
+def main():
+    game = Game(headless=True, seed=0)
+    print(f"{'bullets':>8} {'sprites ms':>11} {'volleys ms':>11} {'in flight':>10}")
+    for bullets in (1, 5, 11, 25, 51):
+        sprite_update, sprite_draw, flying = measure(game, bullets, False)
+        volley_update, volley_draw, _ = measure(game, bullets, True)
+        print(f"{bullets:>8} {sprite_update + sprite_draw:>11.2f} {volley_update + volley_draw:>11.2f} {flying:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,51 @@
+"""Cold start time up to the first frame, per phase.
+
+Run from the repository root: python benchmarks/startup.py
+To time the packaged build instead, pass its executable, e.g.
+python benchmarks/startup.py "dist/肉鸽射击游戏/肉鸽射击游戏"
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RUNS = 10
+
+
+def run_once(command, env):
+    start = time.perf_counter()
+    output = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True).stdout
+    wall = time.perf_counter() - start
+    phases = {}
+    for line in output.splitlines():
+        if line.endswith(" ms"):
+            phase, ms = line[:-3].rsplit(None, 1)
+            phases[phase.strip()] = float(ms)
+    return wall * 1000, phases
+
+
+def main():
+    command = sys.argv[1:] or [sys.executable, "main.py"]
+    command = command + ["--startup-profile"]
+    env = dict(os.environ, PYGAME_HIDE_SUPPORT_PROMPT="1")
+    env.setdefault("SDL_VIDEODRIVER", "dummy")
+    env.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    run_once(command, env) # Warm the OS file cache so every run below is comparable
+    walls, runs = [], []
+    for _ in range(RUNS):
+        wall, phases = run_once(command, env)
+        walls.append(wall)
+        runs.append(phases)
+
+    print(f"{'phase':<14} {'median ms':>10}")
+    for phase in runs[0]:
+        print(f"{phase:<14} {statistics.median(run.get(phase, 0.0) for run in runs):>10.1f}")
+    # Also counts interpreter start (and unpacking, for a packaged build) before main.py runs
+    print(f"{'process':<14} {statistics.median(walls):>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
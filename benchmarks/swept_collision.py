@@ -0,0 +1,81 @@
+"""Cost of swept projectile queries against enemy count, and how many hits
+an end-position overlap test misses on slow steps.
+
+Run from the repository root: python benchmarks/swept_collision.py
+"""
+import os
+import random
+import sys
+import timeit
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pygame
+from constants import *
+from entities import Enemy
+from main import Game
+from spatial import SpatialHash
+
+
+def spawn(game, count, rng):
+    game.reset_game()
+    game.start_new_game(ENDLESS)
+    for enemy in list(game.enemy_group):
+        enemy.kill()
+    for _ in range(count):
+        game.spawn_enemy(Enemy(game, game.player, pygame.math.Vector2(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT))))
+    return list(game.enemy_group)
+
+
+def segments(rng, count, dt):
+    found = []
+    for _ in range(count):
+        start = pygame.math.Vector2(rng.uniform(0, WIDTH), rng.uniform(0, HEIGHT))
+        found.append((start, start + pygame.math.Vector2(PROJECTILE_SPEED * dt, 0).rotate(rng.uniform(0, 360))))
+    return found
+
+
+def main():
+    game = Game(headless=True, seed=0)
+    rng = random.Random(0)
+    size = (PROJECTILE_SIZE, PROJECTILE_SIZE)
+
+    print(f"{'enemies':>8} {'linear us':>10} {'sweep us':>10} {'speedup':>8}")
+    for count in (100, 1000, 5000, 10000):
+        enemies = spawn(game, count, rng)
+        grid = game.enemy_grid
+        paths = segments(rng, 200, 1 / FPS)
+
+        def linear():
+            for start, end in paths:
+                dx, dy = end - start
+                found = []
+                for enemy in enemies:
+                    rect = enemy.rect
+                    if SpatialHash._entry(start.x, start.y, dx, dy, rect.left - size[0] / 2, rect.top - size[1] / 2,
+                                          rect.right + size[0] / 2, rect.bottom + size[1] / 2) is not None:
+                        found.append(enemy)
+
+        swept = timeit.timeit(lambda: [grid.sweep(start, end, size) for start, end in paths], number=3)
+        scanned = timeit.timeit(linear, number=1) * 3
+        per_query = 1e6 / (3 * len(paths))
+        print(f"{count:>8} {scanned * per_query:>10.1f} {swept * per_query:>10.1f} {scanned / swept:>7.1f}x")
+
+    print()
+    print(f"{'step ms':>8} {'end hits':>9} {'swept hits':>11}")
+    spawn(game, 300, rng)
+    grid = game.enemy_grid
+    for dt in (1 / 120, 1 / 60, 1 / 30, 1 / 10):
+        paths = segments(random.Random(1), 2000, dt)
+        end_hits = swept_hits = 0
+        for start, end in paths:
+            rect = pygame.Rect(0, 0, *size)
+            rect.center = end
+            end_hits += bool(grid.query_rect(rect))
+            swept_hits += bool(grid.sweep(start, end, size))
+        print(f"{dt * 1000:>8.1f} {end_hits:>9} {swept_hits:>11}")
+
+
+if __name__ == '__main__':
+    main()
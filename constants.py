@@ -4,6 +4,8 @@ import os
 WIDTH = 1280
 HEIGHT = 720
 FPS = 60
+SIM_STEP = 1 / FPS # Fixed simulation step in seconds, independent of the display rate
+MAX_CATCH_UP_STEPS = 5 # Simulation steps one slow frame may run before the game slows down instead
 SAVE_FILE = "savegame.json"
 HIGHSCORE_FILE = "highscore.json"
 
@@ -38,6 +40,8 @@ PLAYER_SIZE = 30
 PLAYER_SPEED = 250
 PLAYER_HEALTH = 100
 PLAYER_ATTACK_SPEED = 500  # ms
+DASH_DISTANCE = 150
+DASH_BLOOD_DAMAGE = 20 # Dealt to every enemy on the dash path with the 血魔宗 upgrade
 
 ENEMY_SIZE = 25
 ENEMY_SPEED = 120
@@ -46,6 +50,20 @@ ENEMY_DAMAGE = 10
 
 PROJECTILE_SIZE = 10
 PROJECTILE_SPEED = 600
+PROJECTILE_POOL_SIZE = 256 # Projectiles preallocated per game
+SPREAD_ANGLE = 15 # Degrees between neighbouring bullets of a spread shot
+VOLLEY_MIN_BULLETS = 11 # Spread shots this wide fly as one Volley rather than a sprite per bullet; below it sprites are cheaper
+
+GRID_CELL_SIZE = 64 # Spatial hash cell size used for collision broadphase
+TEXT_CACHE_SIZE = 256 # Rendered text surfaces kept by the text cache
+ACCOUNTS_PER_PAGE = 6 # Accounts listed per page on the account selection screen
+AUTOSAVE_INTERVAL = 30 * 1000 # Background snapshot every 30 seconds of play
+PROFILER_FRAMES = 600 # Frames of timing history kept by the profiler
+SPAWNS_PER_FRAME = 64 # Enemies the wave scheduler may create in one frame
+QUALITY_DOWN_COOLDOWN = 30 # Frames the quality governor waits after lowering quality
+QUALITY_UP_COOLDOWN = 120 # and after raising it, so it does not oscillate
+SPLIT_MAX_ENEMIES = 20000 # Entities the simulation process can publish for drawing
+SPLIT_MAX_PROJECTILES = 4096
 
 # --- File Paths ---
 # Get the absolute path to the directory where the script is located
@@ -0,0 +1,66 @@
+import pygame
+from constants import *
+
+
+class DirtyRectRenderer:
+    """Renderer that only redraws and pushes what changed.
+
+    Menus and overlays are drawn once and then left alone until their content
+    changes. While playing, last frame's sprite rects are cleared, sprites and
+    HUD are drawn again, and only the old and new sprite rects (plus the HUD
+    when its values changed) are pushed with display.update(rects).
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.sprite_rects = []
+        self.signature = None
+        self.hud_signature = None
+
+    def invalidate(self):
+        self.signature = None
+
+    def draw(self):
+        game = self.game
+        screen = game.screen
+
+        if game.game_state != PLAYING:
+            signature = game.ui.screen_signature()
+            if signature != self.signature:
+                game.draw_frame()
+                pygame.display.flip()
+                self.signature = signature
+            elif game.profiler.visible:
+                pygame.display.update(game.profiler.draw(screen))
+            return
+
+        hud_signature = game.ui.hud_signature()
+        if self.signature != PLAYING:
+            # Coming from another screen, everything has to be pushed once
+            screen.fill(WHITE)
+            self.sprite_rects = game.draw_sprites(screen, True)
+            game.ui.draw(screen)
+            game.profiler.draw(screen)
+            pygame.display.flip()
+            self.signature = PLAYING
+            self.hud_signature = hud_signature
+            return
+
+        # The HUD is antialiased text, so it is cleared and drawn again every
+        # frame instead of on top of itself, but only pushed when it changed
+        dirty = self.sprite_rects
+        hud_rects = game.ui.hud_rects()
+        for rect in dirty + hud_rects:
+            screen.fill(WHITE, rect)
+
+        self.sprite_rects = game.draw_sprites(screen, True)
+        game.profiler.mark("sprites")
+        game.ui.draw(screen)
+        game.profiler.mark("ui")
+        if hud_signature != self.hud_signature:
+            dirty = dirty + hud_rects
+        overlay_rect = game.profiler.draw(screen)
+        if overlay_rect:
+            dirty = dirty + [overlay_rect]
+        pygame.display.update(dirty + self.sprite_rects)
+        self.hud_signature = hud_signature
@@ -1,16 +1,22 @@
-import pygame
 from entities import Enemy
+from assets import asset_cache
 from constants import ENEMY_SIZE, ENEMY_HEALTH, ENEMY_SPEED, GREEN
 
 class Boss(Enemy):
-    def __init__(self, game, player):
-        super().__init__(game, player)
-        self.image = pygame.Surface((ENEMY_SIZE * 2, ENEMY_SIZE * 2))
-        self.image.fill(GREEN)
+    kind_id = 1
+
+    def __init__(self, game, player, pos=None):
+        super().__init__(game, player, pos)
         self.health = (ENEMY_HEALTH * (2 ** ((self.game.level - 1) // 5))) * 20 # 20x health of a normal enemy
         self.speed = ENEMY_SPEED * 0.8 # Slightly slower
 
+    @classmethod
+    def default_image(cls):
+        return asset_cache.get_surface("boss", (ENEMY_SIZE * 2, ENEMY_SIZE * 2), GREEN)
+
 class TutorialBoss(Boss):
-    def __init__(self, game, player):
-        super().__init__(game, player)
+    kind_id = 2
+
+    def __init__(self, game, player, pos=None):
+        super().__init__(game, player, pos)
         self.health = 50 # Weak boss for tutorial
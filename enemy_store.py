@@ -0,0 +1,125 @@
+import numpy as np
+
+
+class EnemyStore:
+    """Structure-of-arrays state for every live enemy.
+
+    Enemy sprites only keep their image and slot index; position, speed,
+    health and damage live in the arrays here so the whole horde is steered,
+    moved and checked for death in a few batched operations per tick. Slots
+    stay packed: removing an enemy moves the last one into its place.
+    """
+
+    def __init__(self, cell_size, capacity=256):
+        self.cell_size = cell_size
+        self.count = 0
+        self.sprites = []
+        self.pos = np.zeros((capacity, 2))
+        self.prev_pos = np.zeros((capacity, 2)) # pos before the last update, for interpolated drawing
+        self.speed = np.zeros(capacity)
+        self.health = np.zeros(capacity)
+        self.damage = np.zeros(capacity, dtype=np.int64)
+        self.half_size = np.zeros((capacity, 2), dtype=np.int64)
+        self.cell = np.zeros((capacity, 2), dtype=np.int64)
+        self.kind = np.zeros(capacity, dtype=np.int64) # Sprite class's kind_id
+
+    def __len__(self):
+        return self.count
+
+    def _arrays(self):
+        return (self.pos, self.prev_pos, self.speed, self.health, self.damage, self.half_size, self.cell, self.kind)
+
+    def _grow(self):
+        capacity = len(self.speed) * 2
+        for name in ('pos', 'prev_pos', 'speed', 'health', 'damage', 'half_size', 'cell', 'kind'):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.count] = old[:self.count]
+            setattr(self, name, new)
+
+    def add(self, sprite):
+        if self.count == len(self.speed):
+            self._grow()
+        slot = self.count
+        for array in self._arrays():
+            array[slot] = 0
+        self.kind[slot] = sprite.kind_id
+        self.sprites.append(sprite)
+        self.count += 1
+        return slot
+
+    def remove(self, sprite):
+        slot = sprite.slot
+        if slot is None:
+            return
+        last = self.count - 1
+        if slot != last:
+            for array in self._arrays():
+                array[slot] = array[last]
+            moved = self.sprites[last]
+            self.sprites[slot] = moved
+            moved.slot = slot
+        self.sprites.pop()
+        self.count = last
+        sprite.slot = None
+
+    def set_size(self, slot, size):
+        # Matches pygame's Rect: left = round(centerx) - width // 2
+        self.half_size[slot] = (size[0] // 2, size[1] // 2)
+
+    def place(self, slot, pos):
+        # A jump, not movement: nothing is interpolated, and the cell matches the grid's from here on
+        self.pos[slot] = self.prev_pos[slot] = (pos[0], pos[1])
+        self.cell[slot] = self.centers(self.pos[slot]) // self.cell_size
+
+    def centers(self, pos=None):
+        # pygame rounds rect centers half away from zero
+        pos = self.pos[:self.count] if pos is None else pos
+        return np.trunc(pos + np.copysign(0.5, pos)).astype(np.int64)
+
+    def update(self, target, dt):
+        """Steer every enemy straight at target. Returns slots that changed grid cell."""
+        n = self.count
+        if not n:
+            return np.empty(0, dtype=np.int64)
+        pos = self.pos[:n]
+        self.prev_pos[:n] = pos
+        delta = np.subtract(target, pos)
+        dist = np.hypot(delta[:, 0], delta[:, 1])
+        scale = np.divide(self.speed[:n] * dt, dist, out=np.zeros(n), where=dist > 0)
+        pos += delta * scale[:, None]
+
+        cell = self.centers() // self.cell_size
+        changed = np.flatnonzero((cell != self.cell[:n]).any(axis=1))
+        self.cell[:n] = cell
+        return changed
+
+    def dead(self):
+        return [self.sprites[slot] for slot in np.flatnonzero(self.health[:self.count] <= 0)]
+
+    def draw(self, surface, doreturn=False, alpha=1.0, cull=False, scale=1.0, scaled_image=None):
+        """Blit every enemy, alpha of the way from its previous to its current position.
+
+        With cull, enemies entirely outside the surface are skipped. With a
+        scale below 1 positions are shrunk and images come from scaled_image.
+        """
+        if not self.count:
+            return []
+        pos = None
+        if alpha < 1:
+            prev = self.prev_pos[:self.count]
+            pos = prev + (self.pos[:self.count] - prev) * alpha
+        half_size = self.half_size[:self.count]
+        images = [sprite.image for sprite in self.sprites]
+        if scale != 1:
+            pos = (self.pos[:self.count] if pos is None else pos) * scale
+            half_size = (half_size * scale).astype(np.int64)
+            images = [scaled_image(image) for image in images]
+        topleft = self.centers(pos) - half_size
+        if cull:
+            bottomright = topleft + 2 * half_size
+            visible = np.flatnonzero((bottomright[:, 0] >= 0) & (bottomright[:, 1] >= 0) &
+                                     (topleft[:, 0] < surface.get_width()) & (topleft[:, 1] < surface.get_height()))
+            images = [images[i] for i in visible.tolist()]
+            topleft = topleft[visible]
+        return surface.blits(zip(images, topleft.tolist()), doreturn=doreturn) or []
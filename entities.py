@@ -1,34 +1,49 @@
 import pygame
 from constants import *
-import random
+from assets import asset_cache
+from volleys import Volley, fan_directions
 
 
 
 class Projectile(pygame.sprite.Sprite):
-    def __init__(self, game, pos, direction):
+    def __init__(self, game, pos, direction, image=None, pool=None):
         super().__init__()
         self.game = game
-        self.image = pygame.Surface((PROJECTILE_SIZE, PROJECTILE_SIZE))
-        self.image.fill(YELLOW)
+        self.image = image or asset_cache.get_surface("projectile", (PROJECTILE_SIZE, PROJECTILE_SIZE), YELLOW)
         self.rect = self.image.get_rect(center=pos)
         self.pos = pygame.math.Vector2(pos)
+        self.prev_pos = pygame.math.Vector2(pos) # Position before the last step, for interpolated drawing
         self.direction = direction
         self.speed = PROJECTILE_SPEED
+        self.pool = pool
+
+    def reset(self, pos, direction, origin=None):
+        # origin is where it was fired from if that was earlier in the current step
+        self.pos.update(pos)
+        self.prev_pos.update(origin if origin is not None else pos)
+        self.rect.center = self.pos
+        self.direction = direction
+
+    def kill(self):
+        super().kill()
+        if self.pool:
+            self.pool.release(self)
 
     def update(self):
+        self.prev_pos.update(self.pos)
         self.pos += self.direction * self.speed * self.game.dt
         self.rect.center = self.pos
-        if not self.game.screen.get_rect().colliderect(self.rect):
+        if not self.game.world_rect.colliderect(self.rect):
             self.kill()
 
 class Player(pygame.sprite.Sprite):
     def __init__(self, game):
         super().__init__()
         self.game = game
-        self.image = pygame.Surface((PLAYER_SIZE, PLAYER_SIZE))
-        self.image.fill(BLUE)
+        self.image = asset_cache.get_surface("player", (PLAYER_SIZE, PLAYER_SIZE), BLUE)
         self.rect = self.image.get_rect(center=(WIDTH / 2, HEIGHT / 2))
         self.pos = pygame.math.Vector2(self.rect.center)
+        self.prev_pos = pygame.math.Vector2(self.pos)
         
         self.speed = PLAYER_SPEED
         self.max_health = PLAYER_HEALTH
@@ -38,6 +53,7 @@ class Player(pygame.sprite.Sprite):
         
         self.last_shot_time = 0
         self.kill_count = 0
+        self.killed_by = None
 
         # Skill: Dash
         self.dash_unlocked = True  # Player starts with dash
@@ -48,6 +64,7 @@ class Player(pygame.sprite.Sprite):
         self.dash_key = pygame.K_SPACE
 
     def update(self):
+        self.prev_pos.update(self.pos)
         self.get_keys()
         if self.game.enemy_group:
             self.shoot()
@@ -59,7 +76,7 @@ class Player(pygame.sprite.Sprite):
     def update_skills(self):
         # Dash Cooldown
         if self.dash_unlocked and self.dash_current_charges < self.dash_max_charges:
-            now = pygame.time.get_ticks()
+            now = self.game.ticks
             if now - self.dash_cooldown_timer > self.dash_cooldown:
                 self.add_dash_charge()
                 self.dash_cooldown_timer = now
@@ -68,57 +85,82 @@ class Player(pygame.sprite.Sprite):
         if self.dash_unlocked and self.dash_current_charges > 0:
             self.dash_current_charges -= 1
             if self.dash_current_charges < self.dash_max_charges:
-                self.dash_cooldown_timer = pygame.time.get_ticks()
+                self.dash_cooldown_timer = self.game.ticks
             
+            keys = self.game.get_pressed()
             direction = pygame.math.Vector2(
-                (pygame.key.get_pressed()[pygame.K_RIGHT] or pygame.key.get_pressed()[pygame.K_d]) - 
-                (pygame.key.get_pressed()[pygame.K_LEFT] or pygame.key.get_pressed()[pygame.K_a]),
-                (pygame.key.get_pressed()[pygame.K_DOWN] or pygame.key.get_pressed()[pygame.K_s]) - 
-                (pygame.key.get_pressed()[pygame.K_UP] or pygame.key.get_pressed()[pygame.K_w])
+                (keys[pygame.K_RIGHT] or keys[pygame.K_d]) - 
+                (keys[pygame.K_LEFT] or keys[pygame.K_a]),
+                (keys[pygame.K_DOWN] or keys[pygame.K_s]) - 
+                (keys[pygame.K_UP] or keys[pygame.K_w])
             )
             if direction.length() > 0:
-                self.pos += direction.normalize() * 150
+                start = pygame.math.Vector2(self.pos)
+                self.pos += direction.normalize() * DASH_DISTANCE
+                self.keep_on_screen()
+                if self.game.skill_tree.is_unlocked("dash", "dash_blood"):
+                    self.damage_dash_path(start)
             return True
         return False
 
+    def damage_dash_path(self, start):
+        # The dash is a jump, so everything between the two positions is found with a sweep
+        for _, enemy in self.game.enemy_grid.sweep(start, self.pos, self.rect.size):
+            enemy.health -= DASH_BLOOD_DAMAGE
+
     def add_dash_charge(self, amount=1):
         self.dash_current_charges = min(self.dash_max_charges, self.dash_current_charges + amount)
 
     def get_dash_cooldown_progress(self):
         if not self.dash_unlocked or self.dash_current_charges >= self.dash_max_charges:
             return 1.0
-        return (pygame.time.get_ticks() - self.dash_cooldown_timer) / self.dash_cooldown
+        return (self.game.ticks - self.dash_cooldown_timer) / self.dash_cooldown
 
     def shoot(self):
-        now = pygame.time.get_ticks()
-        if now - self.last_shot_time > self.attack_speed:
-            self.last_shot_time = now
-            
-            closest_enemy = self.find_closest_enemy()
-            if closest_enemy:
-                direction = (closest_enemy.pos - self.pos).normalize()
-                self.create_projectiles(direction)
+        # Every shot that came due during this step is fired at its own time, so the
+        # fire rate keeps scaling when attack_speed is shorter than a step. Projectiles
+        # start where the player was at that time and have already flown the rest of it.
+        # Wide spreads fly as one Volley instead of a pooled sprite per bullet.
+        now = self.game.ticks
+        step_start = now - self.game.dt * 1000
+        shot_time = max(self.last_shot_time + self.attack_speed, step_start)
+        if shot_time > now:
+            return
+        closest_enemy = self.find_closest_enemy()
+        if not closest_enemy:
+            return
+
+        shots = []
+        while shot_time <= now:
+            fraction = (shot_time - step_start) / (now - step_start) if now > step_start else 1.0
+            muzzle = self.prev_pos.lerp(self.pos, fraction)
+            flight = PROJECTILE_SPEED * (now - shot_time) / 1000
+            direction = (closest_enemy.pos - muzzle).normalize()
+            if self.projectile_count >= VOLLEY_MIN_BULLETS:
+                self.game.volleys.add(Volley(self.game, muzzle, fan_directions(direction, self.projectile_count), flight))
+            else:
+                for heading in self.spread_directions(direction):
+                    shots.append((muzzle, muzzle + heading * flight, heading))
+            self.last_shot_time = shot_time
+            shot_time += self.attack_speed
+        if shots:
+            self.game.projectile_pool.acquire_many(shots)
 
     def find_closest_enemy(self):
-        return min(self.game.enemy_group, key=lambda enemy: self.pos.distance_to(enemy.pos), default=None)
+        return self.game.enemy_grid.nearest(self.pos)
 
-    def create_projectiles(self, base_direction):
-        self.spawn_projectile(base_direction)
+    def spread_directions(self, base_direction):
+        directions = [base_direction]
         if self.projectile_count > 1:
-            spread_angle = 15
             num_side_projectiles = (self.projectile_count - 1) // 2
             for i in range(num_side_projectiles):
-                angle = spread_angle * (i + 1)
-                self.spawn_projectile(base_direction.rotate(angle))
-                self.spawn_projectile(base_direction.rotate(-angle))
-
-    def spawn_projectile(self, direction):
-        projectile = Projectile(self.game, self.pos, direction)
-        self.game.all_sprites.add(projectile)
-        self.game.projectile_group.add(projectile)
+                angle = SPREAD_ANGLE * (i + 1)
+                directions.append(base_direction.rotate(angle))
+                directions.append(base_direction.rotate(-angle))
+        return directions
 
     def get_keys(self):
-        keys = pygame.key.get_pressed()
+        keys = self.game.get_pressed()
         vel = pygame.math.Vector2(0, 0)
         if keys[pygame.K_LEFT] or keys[pygame.K_a]: vel.x = -1
         if keys[pygame.K_RIGHT] or keys[pygame.K_d]: vel.x = 1
@@ -140,10 +182,11 @@ class Player(pygame.sprite.Sprite):
     def is_alive(self):
         return self.health > 0
 
-    def take_damage(self, amount):
+    def take_damage(self, amount, source=None):
         self.health -= amount
         if self.health <= 0:
             self.health = 0
+            self.killed_by = source
             self.game.game_state = GAME_OVER
             if self.game.current_mode == "endless" and self.game.level > self.game.highscore:
                 self.game.highscore = self.game.level
@@ -154,14 +197,17 @@ class Player(pygame.sprite.Sprite):
 
 
 class Enemy(pygame.sprite.Sprite):
-    def __init__(self, game, player):
+    kind_id = 0 # Position in snapshot.ENEMY_KINDS
+
+    def __init__(self, game, player, pos=None):
         super().__init__()
         self.game = game
         self.player = player
-        self.image = pygame.Surface((ENEMY_SIZE, ENEMY_SIZE))
-        self.image.fill(RED)
-        self.pos = self.get_spawn_pos()
-        self.rect = self.image.get_rect(center=self.pos)
+        # All state except the image lives in the game's EnemyStore
+        self.store = self.game.enemy_store
+        self.slot = self.store.add(self)
+        self.image = self.default_image()
+        self.pos = pos if pos is not None else self.get_spawn_pos()
         self.speed = ENEMY_SPEED
         self.health = ENEMY_HEALTH * (2 ** ((self.game.level - 1) // 5)) # Double health every 5 levels
         self.damage = ENEMY_DAMAGE
@@ -169,16 +215,67 @@ class Enemy(pygame.sprite.Sprite):
         if self.game.current_mode == "endless":
             self.speed *= 1 + (self.game.level - 1) * 0.05 # Increase speed by 5% each level in endless mode
 
+    @classmethod
+    def default_image(cls):
+        return asset_cache.get_surface("enemy", (ENEMY_SIZE, ENEMY_SIZE), RED)
+
     def get_spawn_pos(self):
         margin = 50
-        side = random.choice(['top', 'bottom', 'left', 'right'])
-        if side == 'top': return pygame.math.Vector2(random.randint(-margin, WIDTH + margin), -margin)
-        if side == 'bottom': return pygame.math.Vector2(random.randint(-margin, WIDTH + margin), HEIGHT + margin)
-        if side == 'left': return pygame.math.Vector2(-margin, random.randint(-margin, HEIGHT + margin))
-        if side == 'right': return pygame.math.Vector2(WIDTH + margin, random.randint(-margin, HEIGHT + margin))
+        rng = self.game.rng
+        side = rng.choice(['top', 'bottom', 'left', 'right'])
+        if side == 'top': return pygame.math.Vector2(rng.randint(-margin, WIDTH + margin), -margin)
+        if side == 'bottom': return pygame.math.Vector2(rng.randint(-margin, WIDTH + margin), HEIGHT + margin)
+        if side == 'left': return pygame.math.Vector2(-margin, rng.randint(-margin, HEIGHT + margin))
+        if side == 'right': return pygame.math.Vector2(WIDTH + margin, rng.randint(-margin, HEIGHT + margin))
 
-    def update(self):
-        if self.player.is_alive():
-            direction = (self.player.pos - self.pos).normalize()
-            self.pos += direction * self.speed * self.game.dt
-            self.rect.center = self.pos
+    # Movement happens in EnemyStore.update for the whole horde at once
+
+    @property
+    def image(self):
+        return self._image
+
+    @image.setter
+    def image(self, image):
+        self._image = image
+        self.store.set_size(self.slot, image.get_size())
+
+    @property
+    def rect(self):
+        return self._image.get_rect(center=tuple(self.store.pos[self.slot]))
+
+    @property
+    def pos(self):
+        return pygame.math.Vector2(tuple(self.store.pos[self.slot]))
+
+    @pos.setter
+    def pos(self, value):
+        self.store.place(self.slot, value)
+
+    @property
+    def speed(self):
+        return float(self.store.speed[self.slot])
+
+    @speed.setter
+    def speed(self, value):
+        self.store.speed[self.slot] = value
+
+    @property
+    def health(self):
+        return float(self.store.health[self.slot])
+
+    @health.setter
+    def health(self, value):
+        self.store.health[self.slot] = value
+
+    @property
+    def damage(self):
+        return int(self.store.damage[self.slot])
+
+    @damage.setter
+    def damage(self, value):
+        self.store.damage[self.slot] = value
+
+    def kill(self):
+        self.game.enemy_grid.remove(self)
+        self.store.remove(self)
+        super().kill()
@@ -0,0 +1,56 @@
+import os
+import time
+
+import pygame
+from constants import FONT_NAME
+
+# pygame's built-in font renders smaller than Source Han Sans at the same size
+FALLBACK_SIZES = {20: 24, 26: 30, 30: 36, 32: 40, 45: 50, 60: 72}
+
+
+class FontRegistry:
+    """Process-wide cache of loaded fonts keyed by (file, size).
+
+    Each font file is parsed once per size no matter how many UIs or buttons
+    ask for it. If the file cannot be loaded pygame's default font is used at
+    a comparable size. Load times are kept for profiling.
+    """
+
+    def __init__(self):
+        self.fonts = {}
+        self.load_times = {}
+        self.hits = 0
+        self.warned = set()
+
+    def get(self, size, name=FONT_NAME):
+        key = (name, size)
+        font = self.fonts.get(key)
+        if font is not None:
+            self.hits += 1
+            return font
+
+        if not pygame.font.get_init():
+            pygame.font.init()
+        start = time.perf_counter()
+        try:
+            font = pygame.font.Font(name, size)
+        except (FileNotFoundError, OSError, pygame.error):
+            if name not in self.warned:
+                print(f"字体文件 '{name}' 未找到，将使用默认字体。")
+                self.warned.add(name)
+            font = pygame.font.Font(None, FALLBACK_SIZES.get(size, round(size * 1.2)))
+        self.load_times[key] = time.perf_counter() - start
+        self.fonts[key] = font
+        return font
+
+    def stats(self):
+        return {
+            "loaded": len(self.fonts),
+            "hits": self.hits,
+            "load_time": sum(self.load_times.values()),
+            "load_times": {f"{os.path.basename(name or 'default')}:{size}": seconds
+                           for (name, size), seconds in self.load_times.items()},
+        }
+
+
+font_registry = FontRegistry()
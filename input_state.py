@@ -0,0 +1,21 @@
+class InputState:
+    """Key state for runs without a window. Indexes like pygame.key.get_pressed()."""
+
+    def __init__(self):
+        self.pressed = set()
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+    def press(self, key):
+        self.pressed.add(key)
+
+    def release(self, key):
+        self.pressed.discard(key)
+
+    def set_keys(self, keys):
+        self.pressed = set(keys)
+
+    def clear(self):
+        self.pressed.clear()
+
@@ -1,3 +1,4 @@
+from startup import startup_timer # First, so the imports below are timed too
 import pygame
 import sys
 import random
@@ -7,29 +8,78 @@ import json
 
 from constants import *
 from entities import Player, Enemy, Projectile
-from endless_mode import Boss, TutorialBoss
+from endless_mode import TutorialBoss
 from account_manager import account_manager
-from ui import Button, SkillPanel, SkillTreePopup
+from ui import Button, Label, InputBox, Checkbox, WidgetTree, SkillPanel, SkillTreePopup
 from skills import SkillTree
+from input_state import InputState
+from spatial import SpatialHash
+from enemy_store import EnemyStore
+from projectile_pool import ProjectilePool
+from assets import asset_cache
+from text_cache import text_cache
+from dirty_renderer import DirtyRectRenderer
+from fonts import font_registry
+from profiler import FrameProfiler
+from waves import WaveScheduler, level_waves
+from volleys import VolleyGroup
+from quality import QualityGovernor
+from render_target import WorldTarget
+import snapshot
+
+startup_timer.mark("imports")
 
 class UI:
     def __init__(self, game):
         self.game = game
-        self.scroll_y = 0
-        try:
-            self.font = pygame.font.Font(FONT_NAME, 30)
-            self.title_font = pygame.font.Font(FONT_NAME, 60)
-            self.score_font = pygame.font.Font(FONT_NAME, 45)
-            self.key_font = pygame.font.Font(FONT_NAME, 20)
-            self.charge_font = pygame.font.Font(FONT_NAME, 26)
-        except FileNotFoundError:
-            print(f"字体文件 '{FONT_NAME}' 未找到，将使用默认字体。")
-            self.font = pygame.font.Font(None, 36)
-            self.title_font = pygame.font.Font(None, 72)
-            self.score_font = pygame.font.Font(None, 50)
-            self.key_font = pygame.font.Font(None, 24)
-            self.charge_font = pygame.font.Font(None, 30)
-
+        # Prebuilt backgrounds and overlays, name -> (content key, surface)
+        self.layers = {}
+        self.hud = None # Values the HUD shows, refreshed at the quality level's rate
+        self.hud_time = 0
+
+    # Fonts are shared across restarts, see fonts.FontRegistry. Each is loaded on first use
+    # so the first screen only pays for the sizes it draws.
+    @property
+    def font(self):
+        return font_registry.get(30)
+
+    @property
+    def title_font(self):
+        return font_registry.get(60)
+
+    @property
+    def score_font(self):
+        return font_registry.get(45)
+
+    @property
+    def key_font(self):
+        return font_registry.get(20)
+
+    @property
+    def charge_font(self):
+        return font_registry.get(26)
+
+    def get_layer(self, name, key, build):
+        cached = self.layers.get(name)
+        if cached and cached[0] == key:
+            return cached[1]
+        layer = build()
+        self.layers[name] = (key, layer)
+        return layer
+
+    def make_background(self, color):
+        layer = pygame.Surface((WIDTH, HEIGHT)).convert()
+        layer.fill(color)
+        return layer
+
+    def make_overlay(self, alpha):
+        layer = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA).convert_alpha()
+        layer.fill((0, 0, 0, alpha))
+        return layer
+
+    def blit_centered(self, layer, font, text, color, center):
+        text_surf = text_cache.render(font, text, color)
+        layer.blit(text_surf, text_surf.get_rect(center=center))
 
     def draw(self, screen):
         if self.game.game_state == ACCOUNT_SELECTION:
@@ -64,66 +114,69 @@ class UI:
                 self.game.skill_tree_popup.draw(screen, self.game.upgrade_points)
 
     def draw_account_selection_screen(self, screen):
-        screen.fill(BLACK)
-        title_text = self.title_font.render("选择或创建账户", True, WHITE)
-        screen.blit(title_text, title_text.get_rect(center=(WIDTH / 2, 100)))
-
-        # Draw account list
-        y_offset = 200
-        for name in account_manager.accounts:
-            color = YELLOW if name == self.game.selected_account else WHITE
-            text = self.font.render(name, True, color)
-            rect = text.get_rect(center=(WIDTH / 2, y_offset))
-            screen.blit(text, rect)
-            y_offset += 50
-
-        # Draw input box
-        input_rect = pygame.Rect(WIDTH / 2 - 150, y_offset, 300, 50)
-        pygame.draw.rect(screen, WHITE, input_rect, 2)
-        input_text = self.font.render(self.game.account_input_text, True, WHITE)
-        screen.blit(input_text, (input_rect.x + 5, input_rect.y + 5))
-
-        # Draw buttons
-        create_button = Button(WIDTH / 2 - 150, y_offset + 60, 140, 50, "创建", 0, lambda g: g.create_account())
-        enter_button = Button(WIDTH / 2 + 10, y_offset + 60, 140, 50, "进入游戏", 0, lambda g: g.select_account())
-        create_button.draw(screen, 1)
-        enter_button.draw(screen, 1)
-
+        screen.blit(self.get_layer("account_selection", None, self.build_account_selection_layer), (0, 0))
+        self.game.refresh_account_menu()
+        self.game.account_menu.draw(screen, self.game, 1)
+
+    def build_account_selection_layer(self):
+        layer = self.make_background(BLACK)
+        self.blit_centered(layer, self.title_font, "选择或创建账户", WHITE, (WIDTH / 2, 100))
+        return layer
+
+    def screen_signature(self):
+        # Everything a menu or overlay screen shows; if it is unchanged so is the screen
+        game = self.game
+        return (game.game_state, game.current_mode, game.tutorial_stage, game.scroll_y, game.is_zen_mode,
+                game.highscore, game.selected_account, game.account_input_text, game.account_page, account_manager.version,
+                self.save_error_message(), self.hud_signature())
+
+    def hud_signature(self):
+        game = self.game
+        if self.hud is None or not game.ticks - self.hud_time < game.quality.settings.hud_interval:
+            player = game.player
+            self.hud = (player.health, player.max_health, player.kill_count, game.level, game.upgrade_points,
+                        player.dash_unlocked, player.dash_current_charges, int(player.get_dash_cooldown_progress() * 60),
+                        game.quality.level)
+            self.hud_time = game.ticks
+        return self.hud
+
+    def hud_rects(self):
+        # Areas draw_player_hud and draw_skill_slots may touch
+        slot_size, slot_margin = 60, 10
+        slots_width = 4 * slot_size + 3 * slot_margin
+        return [
+            pygame.Rect(0, 0, 320, 150),
+            pygame.Rect(WIDTH - 160, 0, 160, 75),
+            pygame.Rect((WIDTH - slots_width) / 2, HEIGHT - slot_size - slot_margin, slots_width, slot_size),
+        ]
 
     def draw_start_screen(self, screen):
-        screen.fill(BLACK)
-        title_text = self.title_font.render("肉鸽射击游戏", True, WHITE)
-        screen.blit(title_text, title_text.get_rect(center=(WIDTH / 2, HEIGHT / 4)))
-        
-        for button in self.game.start_buttons:
-            button.draw(screen, 1) # Pass 1 to enable drawing
-
-        # Zen mode checkbox
-        zen_rect = pygame.Rect(WIDTH / 2 + 200, HEIGHT / 2 - 25, 200, 50)
-        pygame.draw.rect(screen, WHITE, zen_rect, 2)
-        zen_text = self.font.render("禅模式", True, WHITE)
-        screen.blit(zen_text, (zen_rect.x + 10, zen_rect.y + 10))
-        if self.game.is_zen_mode:
-            pygame.draw.line(screen, GREEN, (zen_rect.x + 120, zen_rect.y + 10), (zen_rect.x + 140, zen_rect.y + 40), 5)
-            pygame.draw.line(screen, GREEN, (zen_rect.x + 140, zen_rect.y + 40), (zen_rect.x + 180, zen_rect.y), 5)
-
+        screen.blit(self.get_layer("start", None, self.build_start_layer), (0, 0))
+        self.game.start_menu.draw(screen, self.game, 1) # Pass 1 to enable drawing
 
-        highscore_text = self.font.render(f"无尽模式最高纪录: {self.game.highscore}", True, YELLOW)
+        highscore_text = text_cache.render(self.font, f"无尽模式最高纪录: {self.game.highscore}", YELLOW)
         screen.blit(highscore_text, highscore_text.get_rect(topright=(WIDTH - 20, 20)))
 
+    def build_start_layer(self):
+        layer = self.make_background(BLACK)
+        self.blit_centered(layer, self.title_font, "肉鸽射击游戏", WHITE, (WIDTH / 2, HEIGHT / 4))
+        return layer
+
     def draw_pause_screen(self, screen):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 150))
-        screen.blit(overlay, (0, 0))
-        title_text = self.title_font.render("游戏暂停", True, WHITE)
-        screen.blit(title_text, title_text.get_rect(center=(WIDTH / 2, HEIGHT / 3)))
+        screen.blit(self.get_layer("pause", None, self.build_pause_layer), (0, 0))
         
-        for button in self.game.pause_buttons:
-            button.draw(screen, 1, self.scroll_y)
+        self.game.pause_menu.draw(screen, self.game, 1, self.game.scroll_y)
+        self.draw_save_error(screen)
+
+    def build_pause_layer(self):
+        layer = self.make_overlay(150)
+        self.blit_centered(layer, self.title_font, "游戏暂停", WHITE, (WIDTH / 2, HEIGHT / 3))
+        return layer
 
     def draw_player_hud(self, screen):
+        health, max_health, kill_count, level, upgrade_points, _, _, _, quality = self.hud_signature()
         # Health Bar
-        health_ratio = self.game.player.health / self.game.player.max_health
+        health_ratio = health / max_health
         bar_rect = pygame.Rect(10, 10, 200, 20)
         fill_rect = pygame.Rect(10, 10, int(200 * health_ratio), 20)
         pygame.draw.rect(screen, RED, bar_rect)
@@ -132,99 +185,137 @@ class UI:
 
         # Stats
         texts = [
-            f"击杀: {self.game.player.kill_count}",
-            f"关卡: {self.game.level}",
-            f"升级点: {self.game.upgrade_points}"
+            f"击杀: {kill_count}",
+            f"关卡: {level}",
+            f"升级点: {upgrade_points}"
         ]
         for i, text in enumerate(texts):
-            color = GREEN if "升级点" in text and self.game.upgrade_points > 0 else BLACK
-            text_surf = self.font.render(text, True, color)
+            color = GREEN if "升级点" in text and upgrade_points > 0 else BLACK
+            text_surf = text_cache.render(self.font, text, color)
             screen.blit(text_surf, (10, 40 + i * 30))
 
         # Pause Hint
-        pause_text = self.key_font.render("ESC 暂停", True, BLACK)
+        pause_text = text_cache.render(self.key_font, "ESC 暂停", BLACK)
         screen.blit(pause_text, pause_text.get_rect(topright=(WIDTH - 10, 10)))
 
+        if quality:
+            quality_text = text_cache.render(self.key_font, f"画质 -{quality}", GREY)
+            screen.blit(quality_text, quality_text.get_rect(topright=(WIDTH - 10, 40)))
+
     def draw_skill_slots(self, screen):
         slot_size = 60
         slot_margin = 10
         start_x = (WIDTH - (4 * slot_size + 3 * slot_margin)) / 2
         start_y = HEIGHT - slot_size - slot_margin
+        _, _, _, _, _, dash_unlocked, dash_charges, progress, _ = self.hud_signature()
 
-        if self.game.player.dash_unlocked:
+        if dash_unlocked:
             x = start_x
             slot_rect = pygame.Rect(x, start_y, slot_size, slot_size)
             
-            progress = self.game.player.get_dash_cooldown_progress()
+            progress /= 60
             
             pygame.draw.rect(screen, BLUE, slot_rect)
-            if progress < 1.0:
+            if progress < 1.0 and self.game.quality.settings.effects:
                 overlay_rect = pygame.Rect(x, start_y, slot_size, slot_size * (1-progress))
                 pygame.draw.rect(screen, (0, 0, 50, 200), overlay_rect)
 
-            charge_text = self.charge_font.render(str(self.game.player.dash_current_charges), True, WHITE)
+            charge_text = text_cache.render(self.charge_font, str(dash_charges), WHITE)
             screen.blit(charge_text, charge_text.get_rect(bottomright=(slot_rect.right - 5, slot_rect.bottom - 5)))
 
             key_name = pygame.key.name(self.game.player.dash_key).upper()
             if key_name == "SPACE": key_name = "空格"
-            key_text = self.key_font.render(key_name, True, WHITE)
+            key_text = text_cache.render(self.key_font, key_name, WHITE)
             screen.blit(key_text, key_text.get_rect(topleft=(slot_rect.left + 5, slot_rect.top + 5)))
 
     def draw_upgrade_screen(self, screen):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 180))
-        screen.blit(overlay, (0, 0))
-        title_text = self.title_font.render("关卡完成", True, WHITE)
-        screen.blit(title_text, title_text.get_rect(center=(WIDTH / 2, 100)))
-        for button in self.game.upgrade_buttons:
-            button.draw(screen, self.game.upgrade_points, self.scroll_y)
+        screen.blit(self.get_layer("upgrade", None, self.build_upgrade_layer), (0, 0))
+        self.game.upgrade_menu.draw(screen, self.game, self.game.upgrade_points, self.game.scroll_y)
+        self.draw_save_error(screen)
+
+    def draw_save_error(self, screen):
+        message = self.save_error_message()
+        if message:
+            self.blit_centered(screen, self.font, message, RED, (WIDTH / 2, 40))
+
+    def save_error_message(self):
+        # Menus do not advance ticks, so the message disappears once the game has moved on
+        error = self.game.save_error
+        return error[1] if error and error[0] == self.game.ticks else None
+
+    def build_upgrade_layer(self):
+        layer = self.make_overlay(180)
+        self.blit_centered(layer, self.title_font, "关卡完成", WHITE, (WIDTH / 2, 100))
+        return layer
 
     def draw_game_over_screen(self, screen):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 220))
-        screen.blit(overlay, (0, 0))
-        title_text = self.title_font.render("游戏结束", True, RED)
-        screen.blit(title_text, title_text.get_rect(center=(WIDTH / 2, HEIGHT / 3)))
-        score_text = self.score_font.render(f"你到达了第 {self.game.level} 关", True, WHITE)
-        screen.blit(score_text, score_text.get_rect(center=(WIDTH / 2, HEIGHT / 2)))
-        restart_text = self.score_font.render("按 R 键重新开始", True, WHITE)
-        screen.blit(restart_text, restart_text.get_rect(center=(WIDTH / 2, HEIGHT / 2 + 80)))
+        screen.blit(self.get_layer("game_over", self.game.level, self.build_game_over_layer), (0, 0))
+
+    def build_game_over_layer(self):
+        layer = self.make_overlay(220)
+        self.blit_centered(layer, self.title_font, "游戏结束", RED, (WIDTH / 2, HEIGHT / 3))
+        self.blit_centered(layer, self.score_font, f"你到达了第 {self.game.level} 关", WHITE, (WIDTH / 2, HEIGHT / 2))
+        self.blit_centered(layer, self.score_font, "按 R 键重新开始", WHITE, (WIDTH / 2, HEIGHT / 2 + 80))
+        return layer
 
     def draw_game_won_screen(self, screen):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 220))
-        screen.blit(overlay, (0, 0))
-        title_text = self.title_font.render("恭喜通关！", True, GREEN)
-        screen.blit(title_text, title_text.get_rect(center=(WIDTH / 2, HEIGHT / 3)))
-        restart_text = self.score_font.render("按 R 键重新开始", True, WHITE)
-        screen.blit(restart_text, restart_text.get_rect(center=(WIDTH / 2, HEIGHT / 2 + 80)))
+        screen.blit(self.get_layer("game_won", None, self.build_game_won_layer), (0, 0))
+
+    def build_game_won_layer(self):
+        layer = self.make_overlay(220)
+        self.blit_centered(layer, self.title_font, "恭喜通关！", GREEN, (WIDTH / 2, HEIGHT / 3))
+        self.blit_centered(layer, self.score_font, "按 R 键重新开始", WHITE, (WIDTH / 2, HEIGHT / 2 + 80))
+        return layer
 
     def draw_tutorial_popup(self, screen, text):
-        overlay = pygame.Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
-        overlay.fill((0, 0, 0, 220))
-        screen.blit(overlay, (0, 0))
-        
+        screen.blit(self.get_layer("tutorial_popup", text, lambda: self.build_tutorial_layer(text)), (0, 0))
+
+    def build_tutorial_layer(self, text):
+        layer = self.make_overlay(220)
         lines = text.split('\n')
         y_offset = HEIGHT / 2 - len(lines) * 20
         for line in lines:
-            popup_text = self.score_font.render(line, True, WHITE)
-            screen.blit(popup_text, popup_text.get_rect(center=(WIDTH / 2, y_offset)))
+            self.blit_centered(layer, self.score_font, line, WHITE, (WIDTH / 2, y_offset))
             y_offset += 50
         
-        continue_text = self.font.render("按任意键继续", True, YELLOW)
-        screen.blit(continue_text, continue_text.get_rect(center=(WIDTH / 2, HEIGHT - 100)))
+        self.blit_centered(layer, self.font, "按任意键继续", YELLOW, (WIDTH / 2, HEIGHT - 100))
+        return layer
 
 
 class Game:
-    def __init__(self):
-        pygame.init()
-        self.screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("肉鸽射击小游戏")
+    def __init__(self, headless=False, dirty_rects=False, seed=None, recorder=None, profile_path=None, display_fps=FPS,
+                 render_scale=1.0, display_flags=0, split=False, startup_profile=False, persist=True):
+        self.headless = headless
+        self.persist = persist # False: never write saves or highscores, e.g. in the split worker
+        if self.headless:
+            # Simulation only: no window, no UI, input comes from self.input
+            self.screen = None
+            self.input = InputState()
+        else:
+            # Only the subsystems the game uses; fonts are initialised by the font registry on first use
+            pygame.display.init()
+            # With pygame.SCALED the window or fullscreen mode is stretched by SDL, coordinates stay WIDTH x HEIGHT
+            self.screen = pygame.display.set_mode((WIDTH, HEIGHT), display_flags)
+            pygame.display.set_caption("肉鸽射击小游戏")
+            asset_cache.convert_all()
+            self.input = None
+            startup_timer.mark("display")
+        self.world_rect = pygame.Rect(0, 0, WIDTH, HEIGHT)
+        self.renderer = DirtyRectRenderer(self) if dirty_rects and not headless else None
+        self.render_scale = render_scale # World resolution relative to the window, the quality governor may lower it
+        self.world_target = WorldTarget()
+        self.split = None # SplitSimulation when the world is simulated in another process
         self.clock = pygame.time.Clock()
         self.is_running = True
         self.dt = 0
+        self.ticks = 0 # Simulated time in ms, advanced by step()
+        self.display_fps = display_fps
+        self.accumulator = 0 # Frame time not yet simulated, in seconds
+        self.alpha = 1.0 # How far drawing is between the previous and current step
+        self.scroll_y = 0
         self.max_scroll_y = 0
         self.account_input_text = ''
+        self.account_page = 0
         self.selected_account = None
         self.highscore = 0
         self.is_zen_mode = False
@@ -234,11 +325,33 @@ class Game:
         self.skill_tree_popup = SkillTreePopup(600, 400, self.skill_tree)
         self.last_click_time = 0
         self.last_clicked_account = None
+        self.account_menu = WidgetTree()
+        self.account_menu_version = None
         self.tutorial_stage = 0
         self.tutorial_timer = 0
+        self.snapshot_writer = None # Started on the first save
+        self.last_autosave = 0
+        self.save_error = None # (ticks, message) of the last failed "save and quit", shown until play goes on
+        self.rng = random.Random(seed) # All gameplay randomness, so runs can be replayed
+        self.recorder = recorder
+        self.replaying = False
+        self.profiler = FrameProfiler()
+        # The dirty rect renderer always draws at full resolution, so render_scale would save nothing there
+        self.quality = QualityGovernor(display_fps or FPS, scaling=self.renderer is None)
+        self.profile_path = profile_path # Timings are written here on quit
+        self.startup_profile = startup_profile # Print startup phases and exit after the first frame
 
         self.reset_game()
-        self.check_last_login()
+        startup_timer.mark("menus")
+        if self.headless:
+            self.game_state = START_SCREEN
+        else:
+            self.check_last_login()
+            startup_timer.mark("accounts")
+            if split:
+                from split import SplitSimulation
+                self.split = SplitSimulation(self)
+                startup_timer.mark("split worker")
 
     def check_last_login(self):
         if os.path.exists("last_login.json"):
@@ -255,27 +368,32 @@ class Game:
 
 
     def save_highscore(self):
-        account_data = account_manager.get_current_account_data()
-        if account_data:
-            account_data["highscore"] = self.highscore
-            account_manager.save_accounts()
+        if self.persist:
+            account_manager.save_highscore(self.highscore)
 
     def reset_game(self):
         self.level = 1
         self.upgrade_points = 0
         self.current_mode = None
-        
+        self.reset_world()
+
+        self.ui = None if self.headless else UI(self)
+        self.setup_upgrade_buttons()
+        self.setup_start_buttons()
+        self.setup_pause_buttons()
+
+    def reset_world(self):
         self.all_sprites = pygame.sprite.Group()
         self.enemy_group = pygame.sprite.Group()
         self.projectile_group = pygame.sprite.Group()
+        self.volleys = VolleyGroup() # Spread shots
+        self.enemy_grid = SpatialHash(GRID_CELL_SIZE)
+        self.enemy_store = EnemyStore(GRID_CELL_SIZE)
+        self.projectile_pool = ProjectilePool(self)
+        self.waves = WaveScheduler(self)
         
         self.player = Player(self)
         self.all_sprites.add(self.player)
-        
-        self.ui = UI(self)
-        self.setup_upgrade_buttons()
-        self.setup_start_buttons()
-        self.setup_pause_buttons()
 
     def load_from_account(self):
         account_data = account_manager.get_current_account_data()
@@ -293,6 +411,7 @@ class Game:
         self.pause_buttons.append(Button(cx, sy, w, h, "继续游戏", 0, lambda g: setattr(g, 'game_state', PLAYING)))
         self.pause_buttons.append(Button(cx, sy + gap, w, h, "保存并退出", 0, lambda g: g.save_game()))
         self.pause_buttons.append(Button(cx, sy + 2 * gap, w, h, "回到主菜单", 0, lambda g: g.go_to_main_menu()))
+        self.pause_menu = WidgetTree(self.pause_buttons)
 
     def setup_start_buttons(self):
         self.start_buttons = []
@@ -305,13 +424,16 @@ class Game:
         self.start_buttons.append(Button(cx, sy + 3 * gap, w, h, "新手教程", 0, lambda g: g.start_new_game(TUTORIAL)))
         
         continue_button = Button(cx, sy + 4 * gap, w, h, "继续游戏", 0, lambda g: g.continue_game())
-        save_file = account_manager.get_current_account_data().get("save_file") if account_manager.get_current_account_data() else None
-        if not save_file or not os.path.exists(save_file):
+        if not self.find_save():
             continue_button.cost = -1 # Make it unclickable
         self.start_buttons.append(continue_button)
         self.start_buttons.append(Button(cx, sy + 5 * gap, w, h, "切换账户", 0, lambda g: g.switch_account()))
         self.start_buttons.append(Button(cx, sy + 6 * gap, w, h, "退出游戏", 0, lambda g: g.quit()))
 
+        zen_checkbox = Checkbox(WIDTH / 2 + 200, HEIGHT / 2 - 25, 200, 50, "禅模式",
+                                lambda g: g.is_zen_mode, lambda g: setattr(g, 'is_zen_mode', not g.is_zen_mode))
+        self.start_menu = WidgetTree(self.start_buttons + [zen_checkbox])
+
     def switch_account(self):
         if os.path.exists("last_login.json"):
             os.remove("last_login.json")
@@ -324,6 +446,7 @@ class Game:
         self.player.kill_count = 0
         self.player.health = self.player.max_health
         self.zen_wave = 0
+        self.last_autosave = self.ticks
         
         if mode == TUTORIAL:
             self.tutorial_stage = 1
@@ -331,13 +454,15 @@ class Game:
         else:
             self.game_state = PLAYING
             self.start_new_level(False)
+        if self.recorder:
+            self.recorder.start(self)
 
     def continue_game(self):
-        if self.load_game():
-            self.game_state = PLAYING
-        else:
+        if not self.load_game():
             # This should not happen if button is disabled
             self.start_new_game("normal")
+        elif self.recorder:
+            self.recorder.start(self)
 
     def go_to_main_menu(self):
         self.game_state = START_SCREEN
@@ -346,19 +471,12 @@ class Game:
         if increment_level:
             self.level += 1
         self.game_state = PLAYING
+        self.waves.schedule(level_waves(self.current_mode, self.level))
 
-        if self.current_mode == "endless" and self.level % 20 == 0:
-            # Spawn a boss
-            boss = Boss(self, self.player)
-            self.all_sprites.add(boss)
-            self.enemy_group.add(boss)
-        else:
-            # Spawn normal enemies
-            num_enemies = 5 + self.level * 3
-            for _ in range(num_enemies):
-                enemy = Enemy(self, self.player)
-                self.all_sprites.add(enemy)
-                self.enemy_group.add(enemy)
+    def spawn_enemy(self, enemy):
+        # Enemies are moved and drawn through self.enemy_store, not all_sprites
+        self.enemy_group.add(enemy)
+        self.enemy_grid.insert(enemy)
 
     def setup_upgrade_buttons(self):
         self.upgrade_buttons = []
@@ -378,123 +496,193 @@ class Game:
         self.upgrade_buttons.append(Button(cx, sy + len(upgrades) * gap, w, h, "下一关", 0, lambda g: g.start_new_level()))
         self.upgrade_buttons.append(Button(cx, sy + (len(upgrades) + 1) * gap, w, h, "回到主菜单", 0, lambda g: g.go_to_main_menu()))
         self.upgrade_buttons.append(Button(cx, sy + (len(upgrades) + 2) * gap, w, h, "保存并退出", 0, lambda g: g.save_game()))
+        self.upgrade_menu = WidgetTree(self.upgrade_buttons)
 
     def run(self):
         while self.is_running:
-            self.dt = self.clock.tick(FPS) / 1000.0
+            frame_time = self.clock.tick(self.display_fps) / 1000.0
+            self.profiler.start()
             self.events()
-            self.update()
+            self.profiler.mark("events")
+
+            if self.split:
+                # The worker process simulates, this one only forwards input and draws
+                self.split.update()
+            else:
+                # Simulate in fixed steps; after a long stall drop the backlog instead of racing to catch up
+                self.accumulator = min(self.accumulator + frame_time, SIM_STEP * MAX_CATCH_UP_STEPS)
+                while self.accumulator >= SIM_STEP:
+                    if self.recorder:
+                        self.recorder.record_frame(SIM_STEP, self.get_pressed())
+                    self.step(SIM_STEP)
+                    self.accumulator -= SIM_STEP
+                self.alpha = self.accumulator / SIM_STEP if self.game_state == PLAYING and self.quality.settings.effects else 1.0
             self.draw()
+            if not startup_timer.done:
+                startup_timer.finish()
+                if self.startup_profile:
+                    print(startup_timer.report())
+                    self.is_running = False
+            if self.split and self.split.running:
+                self.profiler.end_frame(self.split.count("enemies"), self.split.count("projectiles"), self.quality.level)
+            else:
+                self.profiler.end_frame(len(self.enemy_store), self.bullet_count(), self.quality.level)
+            self.quality.update(self.profiler.last())
         self.quit()
 
+    def step(self, dt):
+        self.dt = dt
+        self.ticks += dt * 1000
+        self.update()
+
+    def get_pressed(self):
+        if self.input is not None:
+            return self.input
+        return pygame.key.get_pressed()
+
     def events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.is_running = False
 
-            if self.game_state == ACCOUNT_SELECTION:
-                self.handle_account_selection_events(event)
-                continue
+            if event.type == pygame.WINDOWEXPOSED and self.renderer:
+                self.renderer.invalidate()
 
-            if self.game_state == TUTORIAL_POPUP:
-                if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                    if self.tutorial_stage == 1:
-                        self.tutorial_stage = 2
-                        self.game_state = PLAYING
-                        self.tutorial_timer = pygame.time.get_ticks()
-                        # No enemies in this stage
-                    elif self.tutorial_stage == 2.5:
-                        self.game_state = PLAYING
-                        # Spawn tutorial enemies
-                        for _ in range(10):
-                            enemy = Enemy(self, self.player)
-                            enemy.health = 1 # Make them weak
-                            self.all_sprites.add(enemy)
-                            self.enemy_group.add(enemy)
-                    elif self.tutorial_stage == 3:
-                        self.game_state = PLAYING
-                        self.tutorial_stage = 3.5
-                        # Spawn tutorial boss
-                        boss = TutorialBoss(self, self.player)
-                        self.all_sprites.add(boss)
-                        self.enemy_group.add(boss)
+            if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+                self.profiler.toggle()
+                if self.renderer:
+                    self.renderer.invalidate()
                 continue
 
-            if self.game_state == UPGRADING or self.game_state == PAUSED:
-                if event.type == pygame.MOUSEWHEEL:
-                    self.ui.scroll_y += event.y * 30
-                    self.ui.scroll_y = max(-self.max_scroll_y, min(0, self.ui.scroll_y))
-
-            if self.game_state == START_SCREEN:
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    zen_rect = pygame.Rect(WIDTH / 2 + 200, HEIGHT / 2 - 25, 200, 50)
-                    if zen_rect.collidepoint(event.pos):
-                        self.is_zen_mode = not self.is_zen_mode
-                for button in self.start_buttons:
-                    button.handle_event(event, self)
-                continue
+            if self.recorder:
+                self.recorder.record_event(event)
+            self.handle_event(event)
 
-            if self.game_state == PAUSED:
-                for button in self.pause_buttons:
-                    button.handle_event(event, self, self.ui.scroll_y)
+    def handle_event(self, event):
+        if self.game_state == ACCOUNT_SELECTION:
+            self.handle_account_selection_events(event)
+            return
 
-            if event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_ESCAPE:
-                    if self.game_state == PLAYING:
-                        self.game_state = PAUSED
-                        self.ui.scroll_y = 0
-                        
-                        # Recalculate max_scroll_y for pause screen
-                        h, gap = 60, 75
-                        sy = HEIGHT / 2 - h
-                        content_height = (len(self.pause_buttons) * (h + gap)) - gap
-                        self.max_scroll_y = max(0, content_height - (HEIGHT - sy))
-                    elif self.game_state == PAUSED:
-                        self.game_state = PLAYING
-                
-                if (self.game_state == GAME_OVER or self.game_state == GAME_WON) and event.key == pygame.K_r:
-                    self.reset_game()
-                
-                if self.game_state == GAME_WON and self.current_mode == TUTORIAL:
-                    if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
-                        self.game_state = ACCOUNT_SELECTION
-                
+        if self.game_state == TUTORIAL_POPUP:
+            if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+                if self.tutorial_stage == 1:
+                    self.tutorial_stage = 2
+                    self.game_state = PLAYING
+                    self.tutorial_timer = self.ticks
+                    # No enemies in this stage
+                elif self.tutorial_stage == 2.5:
+                    self.game_state = PLAYING
+                    # Spawn tutorial enemies
+                    for _ in range(10):
+                        enemy = Enemy(self, self.player)
+                        enemy.health = 1 # Make them weak
+                        self.spawn_enemy(enemy)
+                elif self.tutorial_stage == 3:
+                    self.game_state = PLAYING
+                    self.tutorial_stage = 3.5
+                    # Spawn tutorial boss
+                    self.spawn_enemy(TutorialBoss(self, self.player))
+            return
+
+        if self.game_state == UPGRADING or self.game_state == PAUSED:
+            if event.type == pygame.MOUSEWHEEL:
+                self.scroll_y += event.y * 30
+                self.scroll_y = max(-self.max_scroll_y, min(0, self.scroll_y))
+
+        if self.game_state == START_SCREEN:
+            self.start_menu.handle_event(event, self)
+            return
+
+        if self.game_state == PAUSED:
+            self.pause_menu.handle_event(event, self, self.scroll_y)
+
+        if event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_ESCAPE:
                 if self.game_state == PLAYING:
-                    pass # Player movement and skill activation is handled in Player class
+                    self.game_state = PAUSED
+                    self.scroll_y = 0
+                    
+                    # Recalculate max_scroll_y for pause screen
+                    h, gap = 60, 75
+                    sy = HEIGHT / 2 - h
+                    content_height = (len(self.pause_buttons) * (h + gap)) - gap
+                    self.max_scroll_y = max(0, content_height - (HEIGHT - sy))
+                elif self.game_state == PAUSED:
+                    self.game_state = PLAYING
+            
+            if (self.game_state == GAME_OVER or self.game_state == GAME_WON) and event.key == pygame.K_r:
+                self.reset_game()
+            
+            if self.game_state == GAME_WON and self.current_mode == TUTORIAL:
+                if event.type == pygame.KEYDOWN or event.type == pygame.MOUSEBUTTONDOWN:
+                    self.game_state = ACCOUNT_SELECTION
+            
+            if self.game_state == PLAYING:
+                pass # Player movement and skill activation is handled in Player class
 
-            if self.game_state == UPGRADING:
-                self.skill_panel.handle_event(event, self)
-                for button in self.upgrade_buttons:
-                    button.handle_event(event, self, self.ui.scroll_y)
+        if self.game_state == UPGRADING:
+            self.skill_panel.handle_event(event, self)
+            self.upgrade_menu.handle_event(event, self, self.scroll_y)
 
     def handle_account_selection_events(self, event):
         if event.type == pygame.KEYDOWN:
             if event.key == pygame.K_RETURN:
                 self.create_account()
+            elif event.key == pygame.K_PAGEUP:
+                self.change_account_page(-1)
+            elif event.key == pygame.K_PAGEDOWN:
+                self.change_account_page(1)
             elif event.key == pygame.K_BACKSPACE:
                 self.account_input_text = self.account_input_text[:-1]
-            else:
+                self.account_page = 0
+            elif event.unicode:
+                # The input box doubles as a search filter for the list
                 self.account_input_text += event.unicode
+                self.account_page = 0
         elif event.type == pygame.MOUSEBUTTONDOWN:
-            # Check account selection
-            y_offset = 200
-            for name in account_manager.accounts:
-                rect = pygame.Rect(WIDTH / 2 - 150, y_offset - 25, 300, 50)
-                if rect.collidepoint(event.pos):
-                    current_time = pygame.time.get_ticks()
-                    if self.selected_account == name and current_time - self.last_click_time < 500:
-                        # Double click
-                        self.select_account()
-                        return
-                    self.selected_account = name
-                    self.last_click_time = current_time
-                y_offset += 50
-            
-            # Check button clicks
-            create_button = Button(WIDTH / 2 - 150, y_offset + 60, 140, 50, "创建", 0, lambda g: g.create_account())
-            enter_button = Button(WIDTH / 2 + 10, y_offset + 60, 140, 50, "进入游戏", 0, lambda g: g.select_account())
-            create_button.handle_event(event, self)
-            enter_button.handle_event(event, self)
+            self.refresh_account_menu()
+            self.account_menu.handle_event(event, self)
+
+    def change_account_page(self, step):
+        page_count = max(1, math.ceil(account_manager.count_accounts(self.account_input_text) / ACCOUNTS_PER_PAGE))
+        self.account_page = max(0, min(page_count - 1, self.account_page + step))
+
+    def refresh_account_menu(self):
+        # Lay the account list out again only when the visible page changed
+        version = (account_manager.version, self.account_page, self.account_input_text)
+        if self.account_menu_version == version:
+            return
+        self.account_menu_version = version
+
+        search = self.account_input_text
+        total = account_manager.count_accounts(search)
+        names = account_manager.list_accounts(self.account_page * ACCOUNTS_PER_PAGE, ACCOUNTS_PER_PAGE, search)
+        page_count = max(1, math.ceil(total / ACCOUNTS_PER_PAGE))
+
+        widgets = []
+        y_offset = 200
+        for name in names:
+            widgets.append(Label(WIDTH / 2 - 150, y_offset - 25, 300, 50, name,
+                                 lambda g, name=name: g.click_account(name),
+                                 lambda g, name=name: g.selected_account == name))
+            y_offset += 50
+        widgets.append(InputBox(WIDTH / 2 - 150, y_offset, 300, 50, lambda g: g.account_input_text))
+        widgets.append(Button(WIDTH / 2 - 150, y_offset + 60, 140, 50, "创建", 0, lambda g: g.create_account()))
+        widgets.append(Button(WIDTH / 2 + 10, y_offset + 60, 140, 50, "进入游戏", 0, lambda g: g.select_account()))
+        if page_count > 1:
+            widgets.append(Button(WIDTH / 2 - 150, y_offset + 120, 90, 40, "上一页", 0, lambda g: g.change_account_page(-1)))
+            widgets.append(Label(WIDTH / 2 - 60, y_offset + 120, 120, 40, f"{self.account_page + 1}/{page_count}"))
+            widgets.append(Button(WIDTH / 2 + 60, y_offset + 120, 90, 40, "下一页", 0, lambda g: g.change_account_page(1)))
+        self.account_menu.set_widgets(widgets)
+
+    def click_account(self, name):
+        current_time = pygame.time.get_ticks()
+        if self.selected_account == name and current_time - self.last_click_time < 500:
+            # Double click
+            self.select_account()
+            return
+        self.selected_account = name
+        self.last_click_time = current_time
 
     def create_account(self):
         if self.account_input_text:
@@ -511,17 +699,27 @@ class Game:
 
     def update(self):
         if self.game_state == PLAYING:
+            if self.ticks - self.last_autosave >= AUTOSAVE_INTERVAL and self.current_mode != TUTORIAL:
+                self.autosave()
+
             # Handle tutorial stage progression
             if self.current_mode == TUTORIAL and self.tutorial_stage == 2:
-                if pygame.time.get_ticks() - self.tutorial_timer > 5000: # 5 seconds
+                if self.ticks - self.tutorial_timer > 5000: # 5 seconds
                     self.tutorial_stage = 2.5
                     self.game_state = TUTORIAL_POPUP
 
+            self.waves.update()
+            # Before the player fires, so volleys fired this step are not moved twice
+            self.volleys.update()
             self.all_sprites.update()
+            if self.player.is_alive():
+                self.move_enemies()
+            self.profiler.mark("update")
             self.check_collisions()
+            self.profiler.mark("collisions")
 
             # Handle level completion
-            if not self.enemy_group:
+            if not self.enemy_group and not self.waves:
                 if self.current_mode == TUTORIAL:
                     if self.tutorial_stage == 2:
                         # This is the free-roam time, do nothing.
@@ -545,7 +743,7 @@ class Game:
                         self.player.max_health += 5 * (5 if self.is_zen_mode else 1)
                         self.player.heal(5 * (5 if self.is_zen_mode else 1))
                         self.game_state = UPGRADING
-                        self.ui.scroll_y = 0
+                        self.scroll_y = 0
                         self.zen_wave = 0
                         
                         h, gap = 60, 75
@@ -553,58 +751,150 @@ class Game:
                         content_height = (len(self.upgrade_buttons) * (h + gap)) - gap
                         self.max_scroll_y = max(0, content_height - (HEIGHT - sy))
 
+    def move_enemies(self):
+        for slot in self.enemy_store.update(self.player.pos, self.dt):
+            self.enemy_grid.move(self.enemy_store.sprites[slot])
+
     def check_collisions(self):
-        for _ in pygame.sprite.groupcollide(self.enemy_group, self.projectile_group, True, True):
+        # Bullets are swept along their path since the last step, so slow steps cannot carry them through an enemy
+        for projectile in self.projectile_group:
+            hits = self.enemy_grid.sweep(projectile.prev_pos, projectile.pos, projectile.rect.size)
+            if hits:
+                projectile.kill()
+                self.strike(hits, projectile.prev_pos.distance_to(projectile.pos))
+        for hits, travelled in self.volleys.collide(self.enemy_grid):
+            self.strike(hits, travelled)
+
+        for enemy in self.enemy_store.dead():
+            enemy.kill()
             self.player.kill_count += 1
             if self.player.kill_count % 10 == 0:
                 self.upgrade_points += 1
 
         if self.player.is_alive():
-            for hit in pygame.sprite.spritecollide(self.player, self.enemy_group, True):
-                self.player.take_damage(hit.damage)
+            for hit in self.enemy_grid.query_rect(self.player.rect):
+                self.player.take_damage(hit.damage, hit)
+                hit.kill()
+
+    def strike(self, hits, travelled):
+        # A bullet is used up by the first enemy on its path and kills everything
+        # it touches until it is one body length past that
+        reach = hits[0][0] + (PROJECTILE_SIZE / travelled if travelled else 1)
+        for t, enemy in hits:
+            if t > reach:
+                break
+            enemy.health = 0
+
+    def bullet_count(self):
+        return len(self.projectile_group) + self.volleys.bullet_count()
 
     def draw(self):
+        if self.renderer:
+            self.renderer.draw()
+        else:
+            self.draw_frame()
+            pygame.display.flip()
+        self.profiler.mark("flip")
+
+    def draw_frame(self):
         self.screen.fill(WHITE)
         if self.game_state == ACCOUNT_SELECTION:
             self.ui.draw_account_selection_screen(self.screen)
         else:
-            self.all_sprites.draw(self.screen)
+            scale = min(self.render_scale, self.quality.settings.render_scale)
+            if scale < 1:
+                self.world_target.draw(self, self.screen, scale)
+            else:
+                self.draw_sprites(self.screen)
+            self.profiler.mark("sprites")
             self.ui.draw(self.screen)
-        pygame.display.flip()
+        self.profiler.mark("ui")
+        self.profiler.draw(self.screen)
+
+    def draw_sprites(self, surface, doreturn=False, scale=1.0, scaled_image=None):
+        if self.split and self.split.running:
+            return self.split.draw_sprites(surface, doreturn, scale, scaled_image)
+        alpha = self.alpha
+        rects = self.enemy_store.draw(surface, doreturn, alpha, self.quality.settings.cull_offscreen, scale, scaled_image)
+        if scale != 1:
+            blits = []
+            for sprite in self.all_sprites:
+                image = scaled_image(sprite.image)
+                blits.append((image, image.get_rect(center=sprite.prev_pos.lerp(sprite.pos, alpha) * scale)))
+        elif alpha < 1:
+            blits = [(sprite.image, sprite.image.get_rect(center=sprite.prev_pos.lerp(sprite.pos, alpha)))
+                     for sprite in self.all_sprites]
+        else:
+            blits = [(sprite.image, sprite.rect) for sprite in self.all_sprites]
+        image = self.projectile_pool.image if scale == 1 else scaled_image(self.projectile_pool.image)
+        blits += self.volleys.blits(image, alpha, scale)
+        rects += surface.blits(blits, doreturn=doreturn) or []
+        return rects
 
     def quit(self):
+        if self.replaying:
+            # A replayed "save and quit" only ends the replay
+            self.is_running = False
+            return
+        if self.recorder:
+            self.recorder.save()
+        if self.split:
+            self.split.close()
+        if self.profile_path:
+            self.profiler.dump(self.profile_path)
+        if self.snapshot_writer:
+            self.snapshot_writer.flush()
         pygame.quit()
         sys.exit()
 
-    def save_game(self):
+    def snapshot_path(self):
         account_data = account_manager.get_current_account_data()
         if not account_data:
-            return
+            return None
+        return os.path.splitext(account_data["save_file"])[0] + ".sav"
+
+    def find_save(self):
+        # Full-world snapshots replace the old JSON saves, which still load
+        account_data = account_manager.get_current_account_data()
+        if not account_data:
+            return None
+        for path in (self.snapshot_path(), account_data["save_file"]):
+            if os.path.exists(path):
+                return path
+        return None
+
+    def autosave(self):
+        self.last_autosave = self.ticks
+        path = None if self.replaying or not self.persist else self.snapshot_path()
+        if path:
+            if not self.snapshot_writer:
+                self.snapshot_writer = snapshot.SnapshotWriter()
+            # Only the copy happens here; encoding and disk writes run on the writer thread
+            self.snapshot_writer.submit(path, *snapshot.capture(self))
+        return path
 
-        data = {
-            "level": self.level,
-            "upgrade_points": self.upgrade_points,
-            "current_mode": self.current_mode,
-            "player": {
-                "pos": [self.player.pos.x, self.player.pos.y],
-                "speed": self.player.speed,
-                "max_health": self.player.max_health,
-                "health": self.player.health,
-                "attack_speed": self.player.attack_speed,
-                "projectile_count": self.player.projectile_count,
-                "kill_count": self.player.kill_count,
-            }
-        }
-        with open(account_data["save_file"], 'w') as f:
-            json.dump(data, f)
+    def save_game(self):
+        if not self.autosave():
+            return
+        error = self.snapshot_writer.flush()
+        if error:
+            # Stay in the game so the player can try again instead of losing the run
+            # strerror leaves out the path, which would not fit on screen
+            self.save_error = (self.ticks, f"保存失败：{getattr(error, 'strerror', None) or error}")
+            return
         self.quit()
 
     def load_game(self):
-        account_data = account_manager.get_current_account_data()
-        if not account_data or not os.path.exists(account_data["save_file"]):
+        path = self.find_save()
+        if not path:
             return False
-            
-        with open(account_data["save_file"], 'r') as f:
+
+        if snapshot.is_snapshot(path):
+            snapshot.restore(self, *snapshot.read(path))
+            self.last_autosave = self.ticks
+            return True
+
+        with open(path, 'r') as f:
             data = json.load(f)
 
         self.level = data["level"]
@@ -623,5 +913,37 @@ class Game:
         self.start_new_level()
         return True
 
+
 if __name__ == '__main__':
-    Game().run()
+    import argparse
+    import multiprocessing
+    # The packaged build starts the --split worker by re-running this executable
+    multiprocessing.freeze_support()
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dirty-rects", action="store_true", help="only redraw and push changed screen regions")
+    parser.add_argument("--record", metavar="PATH", help="record the last played session for replay.py")
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--fps", type=int, default=FPS, help="display frame rate cap, 0 for uncapped; the simulation always runs at FPS")
+    parser.add_argument("--quality", type=int, help="fix the quality level (0 is best) instead of adapting it to the frame time")
+    parser.add_argument("--render-scale", type=float, default=1.0, help="draw the world at this fraction of the window resolution, e.g. 0.5")
+    parser.add_argument("--scaled", action="store_true", help="let SDL scale the window (pygame.SCALED)")
+    parser.add_argument("--fullscreen", action="store_true")
+    parser.add_argument("--profile", metavar="PATH", help="write frame timings to a .csv or .json file on quit (F3 shows them in game)")
+    parser.add_argument("--startup-profile", action="store_true", help="print how long each startup phase took and exit after the first frame")
+    parser.add_argument("--split", action="store_true", help="run the simulation in a second process and only draw in this one")
+    args = parser.parse_args()
+    if args.split and args.record:
+        parser.error("--record needs the simulation in this process and cannot be combined with --split")
+    if args.dirty_rects and args.render_scale != 1.0:
+        parser.error("--dirty-rects always draws at full resolution and cannot be combined with --render-scale")
+    recorder = None
+    if args.record:
+        from replay import Recorder
+        recorder = Recorder(args.record)
+    flags = (pygame.SCALED if args.scaled else 0) | (pygame.FULLSCREEN if args.fullscreen else 0)
+    game = Game(dirty_rects=args.dirty_rects, seed=args.seed, recorder=recorder, profile_path=args.profile,
+                display_fps=args.fps, render_scale=args.render_scale, display_flags=flags, split=args.split, startup_profile=args.startup_profile)
+    if args.quality is not None:
+        game.quality.enabled = False
+        game.quality.set_level(args.quality)
+    game.run()
@@ -0,0 +1,124 @@
+import csv
+import json
+import time
+
+import numpy as np
+import pygame
+from constants import *
+from fonts import font_registry
+
+PHASES = ("events", "update", "collisions", "sprites", "ui", "flip")
+COLUMNS = PHASES + ("frame", "enemies", "projectiles", "quality")
+PHASE_INDEX = {phase: i for i, phase in enumerate(PHASES)}
+
+
+class FrameProfiler:
+    """Per-phase frame timings kept in a fixed-size ring buffer.
+
+    start() opens a frame, mark(phase) charges the time since the previous
+    mark to that phase, and end_frame() stores the row along with the entity
+    counts. Times are in milliseconds and exclude the frame limiter's sleep.
+    """
+
+    def __init__(self, capacity=PROFILER_FRAMES):
+        self.data = np.zeros((capacity, len(COLUMNS)))
+        self.index = 0
+        self.count = 0
+        self.current = [0.0] * len(PHASES)
+        self.frame_start = self.marked = time.perf_counter()
+        self.visible = False
+        self.overlay = None
+        self.overlay_time = 0
+        self.rect = pygame.Rect(WIDTH - 310, 80, 300, 140)
+
+    def start(self):
+        self.current = [0.0] * len(PHASES)
+        self.frame_start = self.marked = time.perf_counter()
+
+    def mark(self, phase):
+        now = time.perf_counter()
+        self.current[PHASE_INDEX[phase]] += now - self.marked
+        self.marked = now
+
+    def end_frame(self, enemies, projectiles, quality=0):
+        row = self.data[self.index]
+        row[:len(PHASES)] = self.current
+        row[len(PHASES)] = self.marked - self.frame_start
+        row[:len(PHASES) + 1] *= 1000
+        row[len(PHASES) + 1:] = (enemies, projectiles, quality)
+        self.index = (self.index + 1) % len(self.data)
+        self.count = min(self.count + 1, len(self.data))
+
+    def last(self, column="frame"):
+        return self.data[self.index - 1, COLUMNS.index(column)]
+
+    def frames(self):
+        """Recorded rows, oldest first."""
+        if self.count < len(self.data):
+            return self.data[:self.count].copy()
+        return np.roll(self.data, -self.index, axis=0)
+
+    def percentiles(self, column="frame", q=(50, 99)):
+        if not self.count:
+            return [0.0] * len(q)
+        return np.percentile(self.frames()[:, COLUMNS.index(column)], q).tolist()
+
+    def to_csv(self, path):
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(COLUMNS)
+            writer.writerows(self.frames().tolist())
+
+    def to_json(self, path):
+        with open(path, "w") as f:
+            json.dump({"columns": COLUMNS, "frames": self.frames().tolist()}, f)
+
+    def dump(self, path):
+        if path.endswith(".json"):
+            self.to_json(path)
+        else:
+            self.to_csv(path)
+
+    def toggle(self):
+        self.visible = not self.visible
+        self.overlay = None
+
+    def draw(self, surface):
+        """Blit the overlay if visible and return its rect."""
+        if not self.visible:
+            return None
+        now = time.perf_counter()
+        if self.overlay is None or now - self.overlay_time > 0.25:
+            self.overlay = self.build_overlay()
+            self.overlay_time = now
+        return surface.blit(self.overlay, self.rect)
+
+    def build_overlay(self):
+        # Opaque so it can be redrawn in place without clearing underneath
+        overlay = pygame.Surface(self.rect.size)
+        overlay.fill(BLACK)
+        font = font_registry.get(16)
+        frames = self.frames()
+        p50, p99 = self.percentiles()
+        means = frames[:, :len(PHASES)].mean(axis=0) if len(frames) else np.zeros(len(PHASES))
+        counts = frames[-1, len(PHASES) + 1:] if len(frames) else (0, 0, 0)
+        lines = [
+            f"frame p50 {p50:.1f}ms  p99 {p99:.1f}ms",
+            "  ".join(f"{phase} {mean:.2f}" for phase, mean in zip(PHASES[:3], means[:3])),
+            "  ".join(f"{phase} {mean:.2f}" for phase, mean in zip(PHASES[3:], means[3:])),
+            f"enemies {int(counts[0])}  projectiles {int(counts[1])}  quality {int(counts[2])}",
+        ]
+        for i, line in enumerate(lines):
+            overlay.blit(font.render(line, True, WHITE), (5, 3 + i * 18))
+
+        # Sparkline of recent frame times against the frame budget
+        graph = pygame.Rect(5, 78, self.rect.width - 10, self.rect.height - 83)
+        budget = 1000 / FPS
+        recent = frames[-graph.width:, len(PHASES)]
+        scale = graph.height / max(budget * 2, recent.max() if len(recent) else 0)
+        budget_y = graph.bottom - budget * scale
+        pygame.draw.line(overlay, GREY, (graph.left, budget_y), (graph.right, budget_y))
+        if len(recent) > 1:
+            points = [(graph.left + i, graph.bottom - value * scale) for i, value in enumerate(recent.tolist())]
+            pygame.draw.lines(overlay, GREEN, False, points)
+        return overlay
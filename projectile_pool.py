@@ -0,0 +1,77 @@
+import pygame
+from assets import asset_cache
+from constants import *
+from entities import Projectile
+
+
+class ProjectilePool:
+    """Recycles Projectile sprites instead of allocating one per shot.
+
+    Every projectile shares the cached projectile image. Killed projectiles come back to the
+    free list; when it runs dry a new one is made and kept for reuse.
+    """
+
+    def __init__(self, game, capacity=PROJECTILE_POOL_SIZE):
+        self.game = game
+        self.image = asset_cache.get_surface("projectile", (PROJECTILE_SIZE, PROJECTILE_SIZE), YELLOW)
+        self.capacity = capacity
+        self.free = [self._create((0, 0), pygame.math.Vector2()) for _ in range(capacity)]
+        self.hits = 0
+        self.misses = 0
+        self.in_use = 0
+        self.high_water = 0
+
+    def _create(self, pos, direction):
+        projectile = Projectile(self.game, pos, direction, self.image, self)
+        projectile.in_pool = True
+        return projectile
+
+    def _take(self, pos, direction, origin=None):
+        if self.free:
+            projectile = self.free.pop()
+            self.hits += 1
+        else:
+            projectile = self._create(pos, direction)
+            self.misses += 1
+        projectile.reset(pos, direction, origin)
+        projectile.in_pool = False
+        self.in_use += 1
+        self.high_water = max(self.high_water, self.in_use)
+        return projectile
+
+    def acquire(self, pos, direction):
+        projectile = self._take(pos, direction)
+        self.game.all_sprites.add(projectile)
+        self.game.projectile_group.add(projectile)
+        return projectile
+
+    def acquire_many(self, shots):
+        """Fire several projectiles at once from (origin, pos, direction) tuples.
+
+        They are added to the sprite groups in a single call each. Projectiles
+        fired partway through a step start at pos with their previous position
+        at origin, so collision sweeps cover their flight so far.
+        """
+        projectiles = [self._take(pos, direction, origin) for origin, pos, direction in shots]
+        self.game.all_sprites.add(projectiles)
+        self.game.projectile_group.add(projectiles)
+        return projectiles
+
+    def release(self, projectile):
+        if projectile.in_pool:
+            return
+        projectile.in_pool = True
+        self.in_use -= 1
+        self.free.append(projectile)
+
+    def stats(self):
+        requests = self.hits + self.misses
+        return {
+            "capacity": self.capacity,
+            "in_use": self.in_use,
+            "free": len(self.free),
+            "high_water": self.high_water,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 1.0,
+        }
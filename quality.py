@@ -0,0 +1,67 @@
+from collections import namedtuple
+
+from constants import *
+
+QualityLevel = namedtuple("QualityLevel", "hud_interval effects cull_offscreen render_scale")
+
+# From full quality down; each step gives up a little more
+QUALITY_LEVELS = (
+    QualityLevel(hud_interval=0, effects=True, cull_offscreen=False, render_scale=1.0),
+    QualityLevel(hud_interval=100, effects=True, cull_offscreen=True, render_scale=1.0),
+    QualityLevel(hud_interval=250, effects=False, cull_offscreen=True, render_scale=0.75),
+    QualityLevel(hud_interval=500, effects=False, cull_offscreen=True, render_scale=0.5),
+)
+
+
+class QualityGovernor:
+    """Trades optional work for frame time.
+
+    update() is fed each frame's measured work time. When the running
+    average goes over the frame budget the quality level is lowered one
+    step; when it has stayed well under for a while it is raised again.
+    The settings of the current level are read through `settings`.
+    With scaling=False the levels that lower render_scale are left out, for
+    renderers that always draw at full resolution.
+    """
+
+    def __init__(self, target_fps=FPS, enabled=True, scaling=True):
+        self.levels = tuple(level for level in QUALITY_LEVELS if scaling or level.render_scale == 1)
+        self.budget = 1000 / target_fps
+        self.enabled = enabled
+        self.level = 0
+        self.average = 0.0
+        self.cooldown = 0 # Frames to wait before the next change
+        self.changes = 0
+
+    @property
+    def settings(self):
+        return self.levels[self.level]
+
+    def set_level(self, level):
+        self.level = max(0, min(level, len(self.levels) - 1))
+
+    def update(self, frame_ms):
+        self.average += (frame_ms - self.average) * 0.1
+        if not self.enabled:
+            return
+        if self.cooldown:
+            self.cooldown -= 1
+            return
+        if self.average > self.budget * 0.9 and self.level < len(self.levels) - 1:
+            self.level += 1
+            self.cooldown = QUALITY_DOWN_COOLDOWN
+            self.changes += 1
+        elif self.average < self.budget * 0.5 and self.level > 0:
+            self.level -= 1
+            self.cooldown = QUALITY_UP_COOLDOWN
+            self.changes += 1
+
+    def stats(self):
+        return {
+            "level": self.level,
+            "enabled": self.enabled,
+            "average_ms": self.average,
+            "budget_ms": self.budget,
+            "changes": self.changes,
+            **self.settings._asdict(),
+        }
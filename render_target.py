@@ -0,0 +1,40 @@
+import pygame
+from constants import *
+
+
+class WorldTarget:
+    """Offscreen surface the world is drawn into below native resolution.
+
+    Sprites are drawn with pre-shrunk copies of their images at scaled
+    positions, then the whole surface is stretched onto the screen in one
+    pass. The UI is drawn on top afterwards at full resolution.
+    """
+
+    def __init__(self):
+        self.surface = None
+        self.scale = None
+        self.images = {} # original image -> copy at self.scale
+
+    def scaled_image(self, image):
+        scaled = self.images.get(image)
+        if scaled is None:
+            w, h = image.get_size()
+            scaled = pygame.transform.scale(image, (max(1, round(w * self.scale)), max(1, round(h * self.scale))))
+            self.images[image] = scaled
+        return scaled
+
+    def prepare(self, scale):
+        size = (round(WIDTH * scale), round(HEIGHT * scale))
+        if self.surface is None or self.scale != scale:
+            self.surface = pygame.Surface(size)
+            if pygame.display.get_surface() is not None:
+                self.surface = self.surface.convert()
+            self.scale = scale
+            self.images.clear()
+        return self.surface
+
+    def draw(self, game, screen, scale):
+        surface = self.prepare(scale)
+        surface.fill(WHITE)
+        game.draw_sprites(surface, scale=scale, scaled_image=self.scaled_image)
+        pygame.transform.scale(surface, screen.get_size(), screen)
@@ -0,0 +1,172 @@
+import argparse
+import os
+import time
+
+import numpy as np
+import pygame
+from constants import *
+from input_state import InputState
+import snapshot
+
+MAGIC = b"RGRP"
+# Keys the player reads each tick, stored as one bit each
+GAME_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN,
+             pygame.K_a, pygame.K_d, pygame.K_w, pygame.K_s, pygame.K_SPACE)
+EVENT_TYPES = (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN, pygame.MOUSEWHEEL)
+
+
+def pack_keys(keys):
+    mask = 0
+    for bit, key in enumerate(GAME_KEYS):
+        if keys[key]:
+            mask |= 1 << bit
+    return mask
+
+
+def unpack_keys(mask):
+    return [key for bit, key in enumerate(GAME_KEYS) if mask & (1 << bit)]
+
+
+class Recorder:
+    """Records one play session: the world and RNG state it started from,
+    then the frame time, held keys and menu events of every frame.
+
+    A new session starts whenever a game is started or continued; the
+    latest one is written to `path` when the game quits.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.meta = None
+
+    def start(self, game):
+        world_meta, self.world = snapshot.capture(game)
+        self.meta = {"world": world_meta, "rng": game.rng.getstate()}
+        self.frame_dt = []
+        self.frame_keys = []
+        self.events = [] # (frame, type, a, b, c)
+
+    def record_event(self, event):
+        if self.meta is None or event.type not in EVENT_TYPES:
+            return
+        frame = len(self.frame_dt)
+        if event.type == pygame.KEYDOWN:
+            self.events.append((frame, event.type, event.key, 0, 0))
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.events.append((frame, event.type, event.button, event.pos[0], event.pos[1]))
+        else:
+            self.events.append((frame, event.type, event.y, 0, 0))
+
+    def record_frame(self, dt, keys):
+        if self.meta is not None:
+            self.frame_dt.append(dt)
+            self.frame_keys.append(pack_keys(keys))
+
+    def save(self):
+        if self.meta is None:
+            return
+        arrays = dict(self.world)
+        arrays["frame_dt"] = np.array(self.frame_dt, dtype=np.float64)
+        arrays["frame_keys"] = np.array(self.frame_keys, dtype=np.uint16)
+        arrays["events"] = np.array(self.events, dtype=np.int32).reshape(-1, 5)
+        snapshot.write_atomic(self.path, snapshot.encode(self.meta, arrays, MAGIC))
+
+
+class Replay:
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.meta, arrays = snapshot.decode(f.read(), MAGIC)
+        self.frame_dt = arrays.pop("frame_dt")
+        self.frame_keys = arrays.pop("frame_keys")
+        self.world = arrays
+        self.events = {}
+        for frame, type, a, b, c in arrays.pop("events").tolist():
+            self.events.setdefault(frame, []).append(self.make_event(type, a, b, c))
+
+    def __len__(self):
+        return len(self.frame_dt)
+
+    @staticmethod
+    def make_event(type, a, b, c):
+        if type == pygame.KEYDOWN:
+            return pygame.event.Event(type, key=a, mod=0, unicode="")
+        if type == pygame.MOUSEBUTTONDOWN:
+            return pygame.event.Event(type, button=a, pos=(b, c))
+        return pygame.event.Event(type, x=0, y=a)
+
+    def prepare(self, game):
+        """Put game into the recorded starting state."""
+        game.replaying = True
+        if game.input is None:
+            game.input = InputState()
+        version, state, gauss = self.meta["rng"]
+        game.rng.setstate((version, tuple(state), gauss))
+        snapshot.restore(game, self.meta["world"], self.world)
+
+    def frames(self, game):
+        """Feed the recording into game one frame at a time, yielding each frame's dt."""
+        self.prepare(game)
+        for frame, dt in enumerate(self.frame_dt.tolist()):
+            for event in self.events.get(frame, ()):
+                if self.finished(game):
+                    return
+                game.handle_event(event)
+            if self.finished(game):
+                return
+            game.input.set_keys(unpack_keys(int(self.frame_keys[frame])))
+            game.step(dt)
+            yield dt
+
+    @staticmethod
+    def finished(game):
+        # The session is over once the player is back in the menus
+        return not game.is_running or game.game_state in (START_SCREEN, ACCOUNT_SELECTION)
+
+
+def play_headless(replay):
+    """Run the whole recording as fast as possible. Returns (game, per-frame step times in ms)."""
+    from main import Game
+    game = Game(headless=True)
+    times = []
+    start = time.perf_counter()
+    for _ in replay.frames(game):
+        now = time.perf_counter()
+        times.append((now - start) * 1000)
+        start = now
+    return game, times
+
+
+def play_rendered(replay, time_scale=1.0):
+    """Show the recording in a window, time_scale times faster than it was played."""
+    from main import Game
+    game = Game()
+    for dt in replay.frames(game):
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                game.is_running = False
+        game.draw()
+        game.clock.tick(time_scale / dt if dt > 0 else 0)
+    return game
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Play back a session recorded with main.py --record.")
+    parser.add_argument("path")
+    parser.add_argument("--render", action="store_true", help="show the replay in a window instead of running it headless")
+    parser.add_argument("--speed", type=float, default=1.0, help="time scale for --render")
+    args = parser.parse_args()
+
+    replay = Replay(args.path)
+    if args.render:
+        game = play_rendered(replay, args.speed)
+    else:
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        start = time.perf_counter()
+        game, times = play_headless(replay)
+        elapsed = time.perf_counter() - start
+        simulated = replay.frame_dt.sum()
+        print(f"{len(times)}/{len(replay)} frames, {simulated:.1f}s of play in {elapsed:.2f}s")
+        if times:
+            slowest = np.argsort(times)[::-1][:5]
+            print("slowest frames:", ", ".join(f"#{i} {times[i]:.2f}ms" for i in slowest))
+    print(f"state={game.game_state} level={game.level} kills={game.player.kill_count} health={game.player.health}")
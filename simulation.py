@@ -0,0 +1,45 @@
+import argparse
+import time
+
+from constants import *
+from main import Game
+
+
+def run_headless(mode=NORMAL, ticks=FPS * 60, dt=1 / FPS, zen=False, on_upgrade=None, game=None):
+    """Drive a windowless game for a number of fixed ticks and return it.
+
+    `on_upgrade(game)` is called whenever a level is cleared; by default the
+    next level starts straight away without spending any points.
+    """
+    game = game or Game(headless=True)
+    game.is_zen_mode = zen
+    game.start_new_game(mode)
+
+    for _ in range(ticks):
+        if game.game_state == UPGRADING:
+            if on_upgrade:
+                on_upgrade(game)
+            else:
+                game.start_new_level()
+        elif game.game_state != PLAYING:
+            break
+        game.step(dt)
+    return game
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Run the game simulation without a window.")
+    parser.add_argument("--mode", default=NORMAL, choices=[NORMAL, DUNGEON, ENDLESS])
+    parser.add_argument("--zen", action="store_true")
+    parser.add_argument("--ticks", type=int, default=FPS * 60)
+    parser.add_argument("--dt", type=float, default=1 / FPS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    game = run_headless(args.mode, args.ticks, args.dt, args.zen)
+    elapsed = time.perf_counter() - start
+    simulated = game.ticks / 1000
+
+    print(f"state={game.game_state} level={game.level} kills={game.player.kill_count} health={game.player.health}")
+    print(f"simulated {simulated:.1f}s in {elapsed:.2f}s ({simulated / elapsed:.0f}x realtime)")
+    print("projectile pool:", game.projectile_pool.stats())
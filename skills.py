@@ -50,6 +50,10 @@ class SkillTree:
                 return False
         return True
 
+    def is_unlocked(self, skill_id, upgrade_id):
+        skill_def = self.skills.get(skill_id)
+        return bool(skill_def and skill_def.is_learned and skill_def.upgrades[upgrade_id].is_unlocked)
+
     def unlock_upgrade(self, skill_id, upgrade_id):
         skill_def = self.skills[skill_id]
         upgrade = skill_def.upgrades[upgrade_id]
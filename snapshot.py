@@ -0,0 +1,222 @@
+import json
+import os
+import struct
+import threading
+import zlib
+
+import numpy as np
+import pygame
+from constants import *
+from entities import Enemy
+from endless_mode import Boss, TutorialBoss
+from volleys import Volley
+
+MAGIC = b"RGSV"
+VERSION = 1
+ENEMY_KINDS = [Enemy, Boss, TutorialBoss] # Stored as an index per enemy
+
+PLAYER_FIELDS = ("speed", "max_health", "health", "attack_speed", "projectile_count", "kill_count",
+                 "last_shot_time", "dash_unlocked", "dash_cooldown", "dash_max_charges",
+                 "dash_current_charges", "dash_cooldown_timer")
+GAME_FIELDS = ("level", "upgrade_points", "current_mode", "is_zen_mode", "zen_wave", "ticks",
+               "tutorial_stage", "tutorial_timer", "game_state")
+
+
+def capture(game):
+    """Copy the world state on the main thread. Returns (meta, arrays)."""
+    player = game.player
+    meta = {name: getattr(game, name) for name in GAME_FIELDS}
+    meta["player"] = {name: getattr(player, name) for name in PLAYER_FIELDS}
+    meta["player"]["pos"] = [player.pos.x, player.pos.y]
+    meta["skills"] = {
+        skill.id: {
+            "is_learned": skill.is_learned,
+            "level": skill.level,
+            "upgrades": [upgrade.id for upgrade in skill.upgrades.values() if upgrade.is_unlocked],
+        }
+        for skill in game.skill_tree.skills.values()
+    }
+
+    store = game.enemy_store
+    n = store.count
+    projectiles = list(game.projectile_group)
+    pending = list(game.waves.pending)
+    volleys = game.volleys
+    arrays = {
+        "enemy_kind": store.kind[:n].astype(np.uint8),
+        "enemy_pos": store.pos[:n].copy(),
+        "enemy_speed": store.speed[:n].copy(),
+        "enemy_health": store.health[:n].copy(),
+        "enemy_damage": store.damage[:n].copy(),
+        "projectile_pos": np.array([(p.pos.x, p.pos.y) for p in projectiles], dtype=np.float64).reshape(-1, 2),
+        "projectile_direction": np.array([(p.direction.x, p.direction.y) for p in projectiles], dtype=np.float64).reshape(-1, 2),
+        "projectile_speed": np.array([p.speed for p in projectiles], dtype=np.float64),
+        # Only bullets still flying; each volley's run of them is volley_size long
+        "volley_origin": np.array([volley.origin for volley in volleys], dtype=np.float64).reshape(-1, 2),
+        "volley_radius": np.array([volley.radius for volley in volleys], dtype=np.float64),
+        "volley_size": np.array([len(volley) for volley in volleys], dtype=np.int64),
+        "volley_direction": np.concatenate([volley.directions[volley.alive] for volley in volleys] or [np.empty((0, 2))]),
+        "spawn_kind": np.array([ENEMY_KINDS.index(kind) for due, kind, pos in pending], dtype=np.uint8),
+        "spawn_due": np.array([due for due, kind, pos in pending], dtype=np.float64),
+        "spawn_pos": np.array([pos for due, kind, pos in pending], dtype=np.float64).reshape(-1, 2),
+    }
+    return meta, arrays
+
+
+def encode(meta, arrays, magic=MAGIC):
+    header = json.dumps(meta, separators=(",", ":")).encode("utf-8")
+    body = [struct.pack("<I", len(header)), header, struct.pack("<H", len(arrays))]
+    for name, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        name_bytes = name.encode("ascii")
+        dtype = array.dtype.str.encode("ascii")
+        body.append(struct.pack("<B", len(name_bytes)) + name_bytes)
+        body.append(struct.pack("<B", len(dtype)) + dtype)
+        body.append(struct.pack("<B", array.ndim) + struct.pack(f"<{array.ndim}I", *array.shape))
+        body.append(array.tobytes())
+    return magic + struct.pack("<H", VERSION) + zlib.compress(b"".join(body), 6)
+
+
+def decode(data, magic=MAGIC):
+    if data[:4] != magic:
+        raise ValueError("not a snapshot file")
+    (version,) = struct.unpack_from("<H", data, 4)
+    if version != VERSION:
+        raise ValueError(f"unsupported snapshot version {version}")
+    body = zlib.decompress(data[6:])
+
+    (length,) = struct.unpack_from("<I", body, 0)
+    offset = 4
+    meta = json.loads(body[offset:offset + length].decode("utf-8"))
+    offset += length
+    (count,) = struct.unpack_from("<H", body, offset)
+    offset += 2
+
+    arrays = {}
+    for _ in range(count):
+        (length,) = struct.unpack_from("<B", body, offset)
+        name = body[offset + 1:offset + 1 + length].decode("ascii")
+        offset += 1 + length
+        (length,) = struct.unpack_from("<B", body, offset)
+        dtype = np.dtype(body[offset + 1:offset + 1 + length].decode("ascii"))
+        offset += 1 + length
+        (ndim,) = struct.unpack_from("<B", body, offset)
+        shape = struct.unpack_from(f"<{ndim}I", body, offset + 1)
+        offset += 1 + 4 * ndim
+        size = int(np.prod(shape)) * dtype.itemsize
+        arrays[name] = np.frombuffer(body, dtype, int(np.prod(shape)), offset).reshape(shape)
+        offset += size
+    return meta, arrays
+
+
+def restore(game, meta, arrays):
+    """Rebuild the world from a snapshot exactly as it was captured."""
+    game.reset_world()
+    for name in GAME_FIELDS:
+        setattr(game, name, meta[name])
+    if game.game_state == PAUSED:
+        game.game_state = PLAYING
+
+    player = game.player
+    for name, value in meta["player"].items():
+        if name != "pos":
+            setattr(player, name, value)
+    player.pos = pygame.math.Vector2(meta["player"]["pos"])
+    player.prev_pos.update(player.pos)
+    player.rect.center = player.pos
+
+    for skill_id, state in meta["skills"].items():
+        skill = game.skill_tree.skills.get(skill_id)
+        if skill:
+            skill.is_learned = state["is_learned"]
+            skill.level = state["level"]
+            for upgrade in skill.upgrades.values():
+                upgrade.is_unlocked = upgrade.id in state["upgrades"]
+
+    for kind, pos, speed, health, damage in zip(arrays["enemy_kind"], arrays["enemy_pos"], arrays["enemy_speed"],
+                                                arrays["enemy_health"], arrays["enemy_damage"]):
+        enemy = ENEMY_KINDS[kind](game, player, pygame.math.Vector2(tuple(pos)))
+        enemy.speed = speed
+        enemy.health = health
+        enemy.damage = damage
+        game.spawn_enemy(enemy)
+
+    for pos, direction, speed in zip(arrays["projectile_pos"], arrays["projectile_direction"], arrays["projectile_speed"]):
+        projectile = game.projectile_pool.acquire(tuple(pos), pygame.math.Vector2(tuple(direction)))
+        projectile.speed = speed
+
+    directions = np.split(arrays["volley_direction"], np.cumsum(arrays["volley_size"])[:-1])
+    for origin, radius, volley_directions in zip(arrays["volley_origin"], arrays["volley_radius"], directions):
+        volley = Volley(game, origin, volley_directions.copy(), float(radius))
+        volley.prev_radius = volley.radius
+        game.volleys.add(volley)
+
+    # Enemies of the current level that had not spawned yet
+    for kind, due, pos in zip(arrays["spawn_kind"], arrays["spawn_due"], arrays["spawn_pos"]):
+        game.waves.pending.append((float(due), ENEMY_KINDS[kind], tuple(pos)))
+
+
+def is_snapshot(path):
+    with open(path, "rb") as f:
+        return f.read(4) == MAGIC
+
+
+def read(path):
+    with open(path, "rb") as f:
+        return decode(f.read())
+
+
+def write_atomic(path, data):
+    # Write next to the target and rename over it, so a crash never leaves half a save
+    temp_path = path + ".tmp"
+    with open(temp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+
+
+class SnapshotWriter:
+    """Encodes and writes snapshots on a background thread.
+
+    Only the newest pending snapshot per file is kept, so a slow disk never
+    builds up a backlog. flush() blocks until everything queued is on disk
+    and returns the error of the last write, or None if it succeeded.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.busy = False
+        self.error = None
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name="snapshot-writer", daemon=True)
+        self.thread.start()
+
+    def submit(self, path, meta, arrays):
+        with self.condition:
+            self.pending[path] = (meta, arrays)
+            self.condition.notify_all()
+
+    def flush(self):
+        with self.condition:
+            while self.pending or self.busy:
+                self.condition.wait()
+            return self.error
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                path, (meta, arrays) = self.pending.popitem()
+                self.busy = True
+            error = None
+            try:
+                write_atomic(path, encode(meta, arrays))
+            except Exception as exc:
+                error = exc
+            finally:
+                with self.condition:
+                    self.error = error
+                    self.busy = False
+                    self.condition.notify_all()
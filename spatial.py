@@ -0,0 +1,260 @@
+import heapq
+
+import numpy as np
+
+
+class SpatialHash:
+    """Uniform grid over sprite centers.
+
+    Each sprite lives in the cell that holds its rect center and is moved to a
+    new cell only when it crosses a cell border. Queries are padded by the
+    half-size of the largest sprite seen so overlapping rects are never missed.
+    Nearest-neighbour queries measure distance between `sprite.pos` vectors.
+    sweep() finds what a moving box passes through, for movement too fast to
+    be caught by overlap tests at the end position.
+    """
+
+    SCAN_THRESHOLD = 32 # Below this many sprites a plain scan beats the ring search
+
+    def __init__(self, cell_size):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.sprite_cells = {}
+        self.max_half_size = 0
+        self.bounds = None # (min_cx, min_cy, max_cx, max_cy) of every cell used so far
+
+    def __len__(self):
+        return len(self.sprite_cells)
+
+    def __contains__(self, sprite):
+        return sprite in self.sprite_cells
+
+    def cell_of(self, x, y):
+        return (int(x // self.cell_size), int(y // self.cell_size))
+
+    def insert(self, sprite):
+        rect = sprite.rect
+        self.max_half_size = max(self.max_half_size, rect.width / 2, rect.height / 2)
+        cell = self.cell_of(*rect.center)
+        self.sprite_cells[sprite] = cell
+        # Dicts keep insertion order, so queries are deterministic
+        self.cells.setdefault(cell, {})[sprite] = None
+        self._grow_bounds(cell)
+
+    def move(self, sprite):
+        old_cell = self.sprite_cells.get(sprite)
+        if old_cell is None:
+            return
+        cell = self.cell_of(*sprite.rect.center)
+        if cell == old_cell:
+            return
+        self._discard(sprite, old_cell)
+        self.sprite_cells[sprite] = cell
+        self.cells.setdefault(cell, {})[sprite] = None
+        self._grow_bounds(cell)
+
+    def remove(self, sprite):
+        cell = self.sprite_cells.pop(sprite, None)
+        if cell is not None:
+            self._discard(sprite, cell)
+
+    def _discard(self, sprite, cell):
+        bucket = self.cells[cell]
+        del bucket[sprite]
+        if not bucket:
+            del self.cells[cell]
+
+    def _grow_bounds(self, cell):
+        cx, cy = cell
+        if self.bounds is None:
+            self.bounds = (cx, cy, cx, cy)
+        else:
+            x0, y0, x1, y1 = self.bounds
+            if not (x0 <= cx <= x1 and y0 <= cy <= y1):
+                self.bounds = (min(x0, cx), min(y0, cy), max(x1, cx), max(y1, cy))
+
+    def clear(self):
+        self.cells.clear()
+        self.sprite_cells.clear()
+        self.max_half_size = 0
+        self.bounds = None
+
+    def query_rect(self, rect):
+        pad = self.max_half_size
+        x0, y0 = self.cell_of(rect.left - pad, rect.top - pad)
+        x1, y1 = self.cell_of(rect.right + pad, rect.bottom + pad)
+        found = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    for sprite in bucket:
+                        if rect.colliderect(sprite.rect):
+                            found.append(sprite)
+        return found
+
+    def sweep(self, start, end, size=(0, 0)):
+        """Sprites a box of `size` touches while its center moves from start to end.
+
+        Returns (t, sprite) pairs ordered by t, the fraction of the way at
+        which the box first overlaps the sprite's rect. Only cells the padded
+        segment passes through are searched.
+        """
+        x, y = start
+        dx, dy = end[0] - x, end[1] - y
+        half_w, half_h = size[0] / 2, size[1] / 2
+        pad = self.max_half_size + max(half_w, half_h)
+        cell = self.cell_size
+        x0, y0 = self.cell_of(min(x, x + dx) - pad, min(y, y + dy) - pad)
+        x1, y1 = self.cell_of(max(x, x + dx) + pad, max(y, y + dy) + pad)
+        found = []
+        for cx in range(x0, x1 + 1):
+            for cy in range(y0, y1 + 1):
+                bucket = self.cells.get((cx, cy))
+                # Rects of sprites centered in a cell stay within `pad` of it
+                if not bucket or self._entry(x, y, dx, dy, cx * cell - pad, cy * cell - pad,
+                                             (cx + 1) * cell + pad, (cy + 1) * cell + pad) is None:
+                    continue
+                for sprite in bucket:
+                    rect = sprite.rect
+                    t = self._entry(x, y, dx, dy, rect.left - half_w, rect.top - half_h,
+                                    rect.right + half_w, rect.bottom + half_h)
+                    if t is not None:
+                        found.append((t, sprite))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def sweep_many(self, starts, ends, size=(0, 0)):
+        """sweep() for many segments at once, given as (n, 2) arrays.
+
+        Returns {segment index: sorted (t, sprite) list} for the segments that
+        touch anything. Each occupied cell is looked up once however many
+        segments pass near it, and every segment is then tested against the
+        sprites of its own cells in a single array operation.
+        """
+        half = np.array(size, dtype=np.float64) / 2
+        pad = self.max_half_size + half.max()
+        low = np.floor((np.minimum(starts, ends) - pad) / self.cell_size).astype(np.int64)
+        high = np.floor((np.maximum(starts, ends) + pad) / self.cell_size).astype(np.int64)
+        if not len(low) or not self.sprite_cells:
+            return {}
+
+        # Every (segment, cell) pair, with cells packed into one integer so they sort and compare fast
+        span_x, span_y = (high - low).max(axis=0).tolist()
+        segments, keys = [], []
+        for dx in range(span_x + 1):
+            for dy in range(span_y + 1):
+                cell = low + (dx, dy)
+                inside = np.flatnonzero((cell <= high).all(axis=1))
+                segments.append(inside)
+                keys.append((cell[inside, 0] << 32) + cell[inside, 1])
+        segments = np.concatenate(segments)
+        cells, cell_of_pair = np.unique(np.concatenate(keys), return_inverse=True)
+        cy = (cells + (1 << 31)) % (1 << 32) - (1 << 31)
+        buckets = [self.cells.get(cell, ()) for cell in zip(((cells - cy) >> 32).tolist(), cy.tolist())]
+        candidates = [sprite for bucket in buckets for sprite in bucket]
+        if not candidates:
+            return {}
+
+        # Expand each (segment, cell) pair into one pair per sprite in the cell
+        counts = np.array([len(bucket) for bucket in buckets])
+        first = np.cumsum(counts) - counts
+        per_pair = counts[cell_of_pair]
+        segment = np.repeat(segments, per_pair)
+        offset = np.arange(per_pair.sum()) - np.repeat(np.cumsum(per_pair) - per_pair, per_pair)
+        sprite = np.repeat(first[cell_of_pair], per_pair) + offset
+
+        rects = np.array([tuple(candidate.rect) for candidate in candidates], dtype=np.float64)[sprite]
+        start, delta = starts[segment], (ends - starts)[segment]
+        t = self._entries(start[:, 0], start[:, 1], delta[:, 0], delta[:, 1], rects[:, 0] - half[0], rects[:, 1] - half[1],
+                          rects[:, 0] + rects[:, 2] + half[0], rects[:, 1] + rects[:, 3] + half[1])
+        hit = np.flatnonzero(~np.isnan(t))
+        found = {}
+        for i in hit[np.lexsort((sprite[hit], t[hit], segment[hit]))].tolist():
+            found.setdefault(int(segment[i]), []).append((float(t[i]), candidates[sprite[i]]))
+        return found
+
+    @staticmethod
+    def _entries(x, y, dx, dy, left, top, right, bottom):
+        # _entry over broadcast arrays, NaN where the segment misses the box
+        t0, t1 = 0.0, 1.0
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for origin, delta, low, high in ((x, dx, left, right), (y, dy, top, bottom)):
+                a, b = (low - origin) / delta, (high - origin) / delta
+                inside = (low < origin) & (origin < high)
+                still = delta == 0
+                t0 = np.maximum(t0, np.where(still, np.where(inside, -np.inf, np.inf), np.minimum(a, b)))
+                t1 = np.minimum(t1, np.where(still, np.where(inside, np.inf, -np.inf), np.maximum(a, b)))
+        return np.where(t0 < t1, t0, np.nan)
+
+    @staticmethod
+    def _entry(x, y, dx, dy, left, top, right, bottom):
+        # Slab test: where (x, y) + t * (dx, dy), 0 <= t <= 1, enters the box, or None.
+        # Only touching an edge does not count, like Rect.colliderect.
+        t0, t1 = 0.0, 1.0
+        for origin, delta, low, high in ((x, dx, left, right), (y, dy, top, bottom)):
+            if delta:
+                a, b = (low - origin) / delta, (high - origin) / delta
+                if a > b:
+                    a, b = b, a
+                t0, t1 = max(t0, a), min(t1, b)
+            elif not low < origin < high:
+                return None
+        return t0 if t0 < t1 else None
+
+    def nearest(self, pos):
+        found = self.k_nearest(pos, 1)
+        return found[0] if found else None
+
+    def k_nearest(self, pos, k):
+        """Return up to k sprites ordered by distance to pos.
+
+        Searches outward ring by ring from the cell holding pos and stops as
+        soon as no unvisited cell can contain anything closer.
+        """
+        if not self.sprite_cells or k <= 0:
+            return []
+        x, y = pos
+        cx, cy = self.cell_of(x, y)
+        x0, y0, x1, y1 = self.bounds
+        max_ring = max(cx - x0, x1 - cx, cy - y0, y1 - cy, 0)
+
+        found = []
+        for ring in range(max_ring + 1):
+            if 8 * ring > len(self.cells) or len(self.sprite_cells) <= self.SCAN_THRESHOLD:
+                # The ring has more cells than are occupied, scanning is cheaper
+                found = [(self._distance_sq(sprite, x, y), sprite) for sprite in self.sprite_cells]
+                break
+            for cell in self._ring_cells(cx, cy, ring):
+                bucket = self.cells.get(cell)
+                if bucket:
+                    for sprite in bucket:
+                        found.append((self._distance_sq(sprite, x, y), sprite))
+            if len(found) >= k:
+                found = heapq.nsmallest(k, found, key=lambda item: item[0])
+                # Cells beyond this ring are at least `reach` away from pos.
+                # One pixel of slack covers rect centers being rounded.
+                reach = ring * self.cell_size - 1
+                if reach > 0 and found[-1][0] <= reach * reach:
+                    break
+        return [sprite for _, sprite in heapq.nsmallest(k, found, key=lambda item: item[0])]
+
+    @staticmethod
+    def _distance_sq(sprite, x, y):
+        # Enemy.pos builds a Vector2 from the store on every read
+        pos = sprite.pos
+        dx = pos.x - x
+        dy = pos.y - y
+        return dx * dx + dy * dy
+
+    @staticmethod
+    def _ring_cells(cx, cy, ring):
+        if ring == 0:
+            yield (cx, cy)
+            return
+        for x in range(cx - ring, cx + ring + 1):
+            yield (x, cy - ring)
+            yield (x, cy + ring)
+        for y in range(cy - ring + 1, cy + ring):
+            yield (cx - ring, y)
+            yield (cx + ring, y)
@@ -0,0 +1,243 @@
+import multiprocessing
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+import pygame
+from constants import *
+from assets import asset_cache
+import replay
+import snapshot
+
+# Header fields published every step, in this order
+HUD_FIELDS = ("ticks", "level", "upgrade_points", "zen_wave", "player_x", "player_y", "health", "max_health",
+              "kill_count", "dash_current_charges", "dash_max_charges", "dash_cooldown_timer", "enemies", "projectiles")
+HEADER = len(HUD_FIELDS)
+CONTROL = 4 # front buffer, sequence of buffer 0, sequence of buffer 1, held keys
+ENEMY_COLUMNS = 4 # x, y, kind, health
+
+
+def buffer_size():
+    return HEADER + SPLIT_MAX_ENEMIES * ENEMY_COLUMNS + SPLIT_MAX_PROJECTILES * 2
+
+
+class SharedWorld:
+    """Double-buffered render state in shared memory.
+
+    The writer fills the back buffer and then flips `front`. Each buffer
+    has a sequence number that is odd while it is being written, so a
+    reader that raced a write can tell and read again.
+    """
+
+    def __init__(self, name=None):
+        size = (CONTROL + 2 * buffer_size()) * 8
+        self.memory = shared_memory.SharedMemory(name=name, create=name is None, size=size)
+        self.control = np.ndarray(CONTROL, dtype=np.int64, buffer=self.memory.buf)
+        self.buffers = [
+            np.ndarray(buffer_size(), dtype=np.float64, buffer=self.memory.buf, offset=(CONTROL + i * buffer_size()) * 8)
+            for i in range(2)
+        ]
+        if name is None:
+            self.control[:] = 0
+
+    @property
+    def name(self):
+        return self.memory.name
+
+    def publish(self, game):
+        back = 1 - int(self.control[0])
+        buffer = self.buffers[back]
+        self.control[1 + back] += 1
+        store = game.enemy_store
+        player = game.player
+        enemies = min(store.count, SPLIT_MAX_ENEMIES)
+        projectiles = [projectile.pos for projectile in game.projectile_group]
+        for volley in game.volleys:
+            projectiles += volley.positions().tolist()
+        projectiles = projectiles[:SPLIT_MAX_PROJECTILES]
+        buffer[:HEADER] = (game.ticks, game.level, game.upgrade_points, game.zen_wave, player.pos.x, player.pos.y,
+                           player.health, player.max_health, player.kill_count, player.dash_current_charges,
+                           player.dash_max_charges, player.dash_cooldown_timer, enemies, len(projectiles))
+        table = buffer[HEADER:HEADER + SPLIT_MAX_ENEMIES * ENEMY_COLUMNS].reshape(-1, ENEMY_COLUMNS)
+        table[:enemies, :2] = store.pos[:enemies]
+        table[:enemies, 2] = store.kind[:enemies]
+        table[:enemies, 3] = store.health[:enemies]
+        table = buffer[HEADER + SPLIT_MAX_ENEMIES * ENEMY_COLUMNS:].reshape(-1, 2)
+        for i, pos in enumerate(projectiles):
+            table[i] = pos
+        self.control[1 + back] += 1
+        self.control[0] = back
+
+    def read(self):
+        """Copy of the newest complete state as (header, enemies, projectiles)."""
+        while True:
+            front = int(self.control[0])
+            sequence = int(self.control[1 + front])
+            buffer = self.buffers[front]
+            header = buffer[:HEADER].copy()
+            enemies = int(header[HUD_FIELDS.index("enemies")])
+            projectiles = int(header[HUD_FIELDS.index("projectiles")])
+            enemy_table = buffer[HEADER:HEADER + enemies * ENEMY_COLUMNS].reshape(-1, ENEMY_COLUMNS).copy()
+            start = HEADER + SPLIT_MAX_ENEMIES * ENEMY_COLUMNS
+            projectile_table = buffer[start:start + projectiles * 2].reshape(-1, 2).copy()
+            if sequence % 2 == 0 and int(self.control[1 + front]) == sequence:
+                return header, enemy_table, projectile_table
+
+    def close(self, unlink=False):
+        self.control = self.buffers = None
+        self.memory.close()
+        if unlink:
+            self.memory.unlink()
+
+
+def run_worker(conn, name):
+    """Simulation process: steps the world in real time while the main process renders."""
+    from main import Game
+    # Saves and highscores are written by the main process once it has the world back
+    game = Game(headless=True, persist=False)
+    world = SharedWorld(name)
+    running = False
+    while True:
+        message = conn.recv() if not running else (conn.recv() if conn.poll() else None)
+        if message:
+            if message[0] == "start":
+                meta, arrays = snapshot.decode(message[1])
+                snapshot.restore(game, meta, arrays)
+                game.rng.setstate(message[2])
+                running = True
+                accumulator = 0
+                last = time.perf_counter()
+            elif message[0] == "stop" and running:
+                # Not running: the world was already sent back on leaving PLAYING, and that answers the stop
+                running = False
+                conn.send(("state", snapshot.encode(*snapshot.capture(game)), game.rng.getstate()))
+            elif message[0] == "quit":
+                break
+        if not running:
+            continue
+
+        now = time.perf_counter()
+        accumulator = min(accumulator + now - last, SIM_STEP * MAX_CATCH_UP_STEPS)
+        last = now
+        stepped = False
+        while accumulator >= SIM_STEP and game.game_state == PLAYING:
+            game.input.set_keys(replay.unpack_keys(int(world.control[3])))
+            game.step(SIM_STEP)
+            accumulator -= SIM_STEP
+            stepped = True
+        if stepped:
+            world.publish(game)
+        if game.game_state != PLAYING:
+            # Level cleared, player died and so on: the main process takes over again
+            running = False
+            conn.send(("state", snapshot.encode(*snapshot.capture(game)), game.rng.getstate()))
+        else:
+            time.sleep(max(0.0, SIM_STEP - accumulator))
+    world.close()
+
+
+class SplitSimulation:
+    """Runs the PLAYING state in a worker process.
+
+    Whenever the game enters PLAYING the world is handed to the worker as a
+    snapshot; the main process then only sends held keys and draws what the
+    worker publishes. When the worker's game leaves PLAYING, or the main
+    process leaves it (pause), the world is handed back the same way, so
+    menus, upgrades and saving work on the main process as usual.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.world = SharedWorld()
+        self.conn, child = multiprocessing.Pipe()
+        self.process = multiprocessing.Process(target=run_worker, args=(child, self.world.name), daemon=True)
+        self.process.start()
+        self.running = False
+        self.header = None
+        self.enemies = np.empty((0, ENEMY_COLUMNS))
+        self.projectiles = np.empty((0, 2))
+        self.images = {cls.kind_id: cls.default_image() for cls in snapshot.ENEMY_KINDS}
+
+    def count(self, field):
+        return int(self.header[HUD_FIELDS.index(field)]) if self.header is not None else 0
+
+    def update(self):
+        game = self.game
+        if not self.running:
+            if game.game_state == PLAYING:
+                self.start()
+            return
+        if game.game_state != PLAYING:
+            # Left PLAYING on this side, e.g. paused
+            state = game.game_state
+            self.conn.send(("stop",))
+            self.finish(self.conn.recv())
+            if game.game_state == PLAYING:
+                # Otherwise the worker left PLAYING first (level cleared, player died) and that state wins
+                game.game_state = state
+            return
+
+        self.world.control[3] = replay.pack_keys(pygame.key.get_pressed())
+        if self.conn.poll():
+            self.finish(self.conn.recv())
+            return
+        self.header, self.enemies, self.projectiles = self.world.read()
+        self.apply_header()
+
+    def start(self):
+        game = self.game
+        # Publish the current state first so the first frames have something to draw
+        self.world.publish(game)
+        self.header, self.enemies, self.projectiles = self.world.read()
+        self.conn.send(("start", snapshot.encode(*snapshot.capture(game)), game.rng.getstate()))
+        self.running = True
+
+    def finish(self, message):
+        game = self.game
+        _, data, rng_state = message
+        snapshot.restore(game, *snapshot.decode(data))
+        game.rng.setstate(rng_state)
+        self.running = False
+        self.header = None
+        if game.game_state == GAME_OVER and game.current_mode == ENDLESS and game.level > game.highscore:
+            game.highscore = game.level
+            game.save_highscore()
+        if game.ticks - game.last_autosave >= AUTOSAVE_INTERVAL and game.current_mode != TUTORIAL:
+            game.autosave()
+
+    def apply_header(self):
+        # The HUD reads these from the main process's game and player
+        game = self.game
+        player = game.player
+        values = dict(zip(HUD_FIELDS, self.header.tolist()))
+        game.ticks = values["ticks"]
+        game.level = int(values["level"])
+        game.upgrade_points = int(values["upgrade_points"])
+        game.zen_wave = int(values["zen_wave"])
+        player.pos.update(values["player_x"], values["player_y"])
+        player.health = values["health"]
+        player.max_health = values["max_health"]
+        player.kill_count = int(values["kill_count"])
+        player.dash_current_charges = int(values["dash_current_charges"])
+        player.dash_max_charges = int(values["dash_max_charges"])
+        player.dash_cooldown_timer = values["dash_cooldown_timer"]
+
+    def draw_sprites(self, surface, doreturn=False, scale=1.0, scaled_image=None):
+        scaled_image = scaled_image or (lambda image: image)
+        blits = []
+        for x, y, kind, _ in self.enemies.tolist():
+            image = scaled_image(self.images[int(kind)])
+            blits.append((image, image.get_rect(center=(x * scale, y * scale))))
+        image = scaled_image(asset_cache.get_surface("projectile", (PROJECTILE_SIZE, PROJECTILE_SIZE), YELLOW))
+        for x, y in self.projectiles.tolist():
+            blits.append((image, image.get_rect(center=(x * scale, y * scale))))
+        player = self.game.player
+        image = scaled_image(player.image)
+        blits.append((image, image.get_rect(center=player.pos * scale)))
+        return surface.blits(blits, doreturn=doreturn) or []
+
+    def close(self):
+        if self.process.is_alive():
+            self.conn.send(("quit",))
+            self.process.join(1)
+        self.world.close(unlink=True)
@@ -0,0 +1,38 @@
+import time
+
+
+class StartupTimer:
+    """Wall-clock time of each startup phase up to the first frame on screen.
+
+    mark(phase) charges the time since the previous mark to that phase.
+    Once finish() has been called later marks are ignored, so code shared
+    with in-game paths can mark unconditionally.
+    """
+
+    def __init__(self):
+        self.start = self.last = time.perf_counter()
+        self.phases = [] # (phase, seconds) in the order they happened
+        self.done = False
+
+    def mark(self, phase):
+        if self.done:
+            return
+        now = time.perf_counter()
+        self.phases.append((phase, now - self.last))
+        self.last = now
+
+    def finish(self, phase="first frame"):
+        self.mark(phase)
+        self.done = True
+
+    def total(self):
+        return self.last - self.start
+
+    def report(self):
+        lines = [f"{phase:<14}{seconds * 1000:8.1f} ms" for phase, seconds in self.phases]
+        lines.append(f"{'total':<14}{self.total() * 1000:8.1f} ms")
+        return "\n".join(lines)
+
+
+# Created on first import, so importing this module before anything else starts the clock
+startup_timer = StartupTimer()
@@ -0,0 +1,55 @@
+from collections import OrderedDict
+
+from constants import TEXT_CACHE_SIZE
+
+
+class TextCache:
+    """Bounded LRU cache of rendered text surfaces.
+
+    Keyed by (font, text, color, antialias), so a HUD line is only rendered
+    again when its value changes. The least recently used surface is dropped
+    once the cache is full.
+    """
+
+    def __init__(self, max_size=TEXT_CACHE_SIZE):
+        self.max_size = max_size
+        self.surfaces = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.surfaces)
+
+    def render(self, font, text, color, antialias=True):
+        key = (font, text, color, antialias)
+        surface = self.surfaces.get(key)
+        if surface is not None:
+            self.hits += 1
+            self.surfaces.move_to_end(key)
+            return surface
+
+        self.misses += 1
+        surface = font.render(text, antialias, color)
+        self.surfaces[key] = surface
+        if len(self.surfaces) > self.max_size:
+            self.surfaces.popitem(last=False)
+        return surface
+
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def stats(self):
+        return {
+            "size": len(self.surfaces),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate(),
+        }
+
+    def clear(self):
+        self.surfaces.clear()
+
+
+text_cache = TextCache()
@@ -1,13 +1,8 @@
 import pygame
 from constants import *
 from skills import SkillTree
-import os
-
-# --- File Paths ---
-# Get the absolute path to the directory where the script is located
-script_dir = os.path.dirname(os.path.abspath(__file__))
-assets_dir = os.path.join(script_dir, "assets")
-FONT_NAME = os.path.join(assets_dir, "SourceHanSansSC-Regular.ttf")
+from text_cache import text_cache
+from fonts import font_registry
 
 class Button:
     def __init__(self, x, y, w, h, text, cost, callback):
@@ -16,20 +11,30 @@ class Button:
         self.cost = cost
         self.callback = callback
         self.font = None
+        self.surfaces = {} # state -> rendered button
 
-    def draw(self, screen, points, offset_y=0):
-        if not self.font:
-            self.font = pygame.font.Font(FONT_NAME, 32) if FONT_NAME else pygame.font.Font(None, 40)
+    def state(self, game, points):
+        return (points >= self.cost and self.cost != -1, self.cost)
 
-        drawn_rect = self.rect.move(0, offset_y)
-        can_afford = points >= self.cost and self.cost != -1
-        color = GREEN if can_afford else GREY
-        pygame.draw.rect(screen, color, drawn_rect)
-        pygame.draw.rect(screen, BLACK, drawn_rect, 2)
-        
-        display_text = f"{self.text} ({self.cost}点)" if self.cost > 0 else self.text
-        text_surf = self.font.render(display_text, True, BLACK)
-        screen.blit(text_surf, text_surf.get_rect(center=drawn_rect.center))
+    def render(self, game, points):
+        state = self.state(game, points)
+        surface = self.surfaces.get(state)
+        if surface is None:
+            if not self.font:
+                self.font = font_registry.get(32)
+            can_afford = state[0]
+            surface = pygame.Surface(self.rect.size)
+            surface.fill(GREEN if can_afford else GREY)
+            pygame.draw.rect(surface, BLACK, surface.get_rect(), 2)
+
+            display_text = f"{self.text} ({self.cost}点)" if self.cost > 0 else self.text
+            text_surf = text_cache.render(self.font, display_text, BLACK)
+            surface.blit(text_surf, text_surf.get_rect(center=surface.get_rect().center))
+            self.surfaces[state] = surface
+        return surface
+
+    def draw(self, screen, game, points, offset_y=0):
+        screen.blit(self.render(game, points), self.rect.move(0, offset_y))
 
     def handle_event(self, event, game, offset_y=0):
         if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
@@ -38,6 +43,132 @@ class Button:
                 if self.cost > 0: game.upgrade_points -= self.cost
                 self.callback(game)
 
+class Label:
+    def __init__(self, x, y, w, h, text, callback=None, is_selected=None):
+        self.rect = pygame.Rect(x, y, w, h)
+        self.text = text
+        self.callback = callback
+        self.is_selected = is_selected or (lambda game: False)
+        self.surfaces = {}
+
+    def state(self, game, points):
+        return self.is_selected(game)
+
+    def render(self, game, points):
+        selected = self.state(game, points)
+        surface = self.surfaces.get(selected)
+        if surface is None:
+            surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            text_surf = text_cache.render(font_registry.get(30), self.text, YELLOW if selected else WHITE)
+            surface.blit(text_surf, text_surf.get_rect(center=surface.get_rect().center))
+            self.surfaces[selected] = surface
+        return surface
+
+    def handle_event(self, event, game, offset_y=0):
+        if event.type == pygame.MOUSEBUTTONDOWN and self.callback:
+            if self.rect.move(0, offset_y).collidepoint(event.pos):
+                self.callback(game)
+
+class InputBox:
+    def __init__(self, x, y, w, h, get_text):
+        self.rect = pygame.Rect(x, y, w, h)
+        self.get_text = get_text
+        self.surface = None
+        self.text = None
+
+    def state(self, game, points):
+        return self.get_text(game)
+
+    def render(self, game, points):
+        text = self.state(game, points)
+        if self.surface is None or text != self.text:
+            self.surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            pygame.draw.rect(self.surface, WHITE, self.surface.get_rect(), 2)
+            self.surface.blit(text_cache.render(font_registry.get(30), text, WHITE), (5, 5))
+            self.text = text
+        return self.surface
+
+    def handle_event(self, event, game, offset_y=0):
+        pass
+
+class Checkbox:
+    def __init__(self, x, y, w, h, text, is_checked, callback):
+        self.rect = pygame.Rect(x, y, w, h)
+        self.text = text
+        self.is_checked = is_checked
+        self.callback = callback
+        self.surfaces = {}
+
+    def state(self, game, points):
+        return self.is_checked(game)
+
+    def render(self, game, points):
+        checked = self.state(game, points)
+        surface = self.surfaces.get(checked)
+        if surface is None:
+            surface = pygame.Surface(self.rect.size, pygame.SRCALPHA)
+            pygame.draw.rect(surface, WHITE, surface.get_rect(), 2)
+            surface.blit(text_cache.render(font_registry.get(30), self.text, WHITE), (10, 10))
+            if checked:
+                pygame.draw.line(surface, GREEN, (120, 10), (140, 40), 5)
+                pygame.draw.line(surface, GREEN, (140, 40), (180, 0), 5)
+            self.surfaces[checked] = surface
+        return surface
+
+    def handle_event(self, event, game, offset_y=0):
+        if event.type == pygame.MOUSEBUTTONDOWN and self.rect.move(0, offset_y).collidepoint(event.pos):
+            self.callback(game)
+
+class WidgetTree:
+    """Retained group of widgets composited into one cached surface.
+
+    The composite is rebuilt only when a widget's state changes, so an idle
+    menu costs a single blit per frame. Clicks are routed through a grid of
+    cells so only widgets under the cursor are hit-tested.
+    """
+
+    def __init__(self, widgets=(), cell_size=64):
+        self.cell_size = cell_size
+        self.set_widgets(widgets)
+
+    def set_widgets(self, widgets):
+        self.widgets = list(widgets)
+        self.cells = {}
+        self.bounds = self.widgets[0].rect.unionall([w.rect for w in self.widgets[1:]]) if self.widgets else None
+        for widget in self.widgets:
+            rect = widget.rect
+            for cx in range(rect.left // self.cell_size, (rect.right - 1) // self.cell_size + 1):
+                for cy in range(rect.top // self.cell_size, (rect.bottom - 1) // self.cell_size + 1):
+                    self.cells.setdefault((cx, cy), []).append(widget)
+        self.surface = None
+        self.state = None
+
+    def widget_at(self, pos):
+        x, y = pos
+        for widget in self.cells.get((x // self.cell_size, y // self.cell_size), ()):
+            if widget.rect.collidepoint(pos):
+                return widget
+        return None
+
+    def draw(self, screen, game, points, offset_y=0):
+        if not self.widgets:
+            return
+        state = tuple(widget.state(game, points) for widget in self.widgets)
+        if self.surface is None or state != self.state:
+            self.surface = pygame.Surface(self.bounds.size, pygame.SRCALPHA)
+            for widget in self.widgets:
+                self.surface.blit(widget.render(game, points), widget.rect.move(-self.bounds.x, -self.bounds.y))
+            if pygame.display.get_surface() is not None:
+                self.surface = self.surface.convert_alpha()
+            self.state = state
+        screen.blit(self.surface, self.bounds.move(0, offset_y))
+
+    def handle_event(self, event, game, offset_y=0):
+        if event.type == pygame.MOUSEBUTTONDOWN:
+            widget = self.widget_at((event.pos[0], event.pos[1] - offset_y))
+            if widget:
+                widget.handle_event(event, game, offset_y)
+
 class SkillPanel:
     def __init__(self, x, y, w, h, skill_tree):
         self.rect = pygame.Rect(x, y, w, h)
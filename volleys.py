@@ -0,0 +1,123 @@
+import numpy as np
+from constants import *
+
+
+def fan_directions(base_direction, count):
+    """Unit directions of a spread shot: straight ahead, then alternately left and right."""
+    sides = (count - 1) // 2
+    steps = np.arange(1, sides + 1)
+    angles = np.radians(np.concatenate(([0], np.column_stack((steps, -steps)).ravel())) * SPREAD_ANGLE)
+    angles += np.arctan2(base_direction[1], base_direction[0])
+    return np.column_stack((np.cos(angles), np.sin(angles)))
+
+
+def exit_distances(origin, directions, margin=PROJECTILE_SIZE / 2):
+    # How far along each direction a bullet gets before its rect no longer touches the screen
+    low = -margin - origin
+    high = np.array((WIDTH, HEIGHT)) + margin - origin
+    with np.errstate(divide="ignore", invalid="ignore"):
+        distance = np.where(directions > 0, high / directions, np.where(directions < 0, low / directions, np.inf))
+    return distance.min(axis=1)
+
+
+class Volley:
+    """A fan of bullets fired together from one point.
+
+    Every bullet leaves the origin at the same time and speed, so they all
+    stay on a circle around it: the volley only keeps the origin, how far
+    the circle has grown and each bullet's direction. Bullets are never
+    sprites; the volley moves, bounds-checks, collides and draws them as
+    arrays, so a wide spread costs little more than a single shot. A bullet
+    that hits something is dropped from the volley.
+    """
+
+    def __init__(self, game, origin, directions, flight=0.0):
+        self.game = game
+        self.origin = np.array(origin, dtype=np.float64)
+        self.directions = directions
+        self.exit = exit_distances(self.origin, directions)
+        self.alive = self.exit > flight
+        # Radius before and after the current step; a volley fired during a step has already flown part of it
+        self.prev_radius = 0.0
+        self.radius = flight
+
+    def __len__(self):
+        return int(np.count_nonzero(self.alive))
+
+    def update(self):
+        """Grow the circle by one step. Returns False once every bullet is gone."""
+        self.prev_radius = self.radius
+        self.radius += PROJECTILE_SPEED * self.game.dt
+        self.alive &= self.exit > self.radius
+        return bool(self.alive.any())
+
+    def paths(self):
+        """Slots of the live bullets and where each of them went this step."""
+        index = np.flatnonzero(self.alive)
+        directions = self.directions[index]
+        return index, self.origin + directions * self.prev_radius, self.origin + directions * self.radius
+
+    def positions(self, alpha=1.0):
+        radius = self.prev_radius + (self.radius - self.prev_radius) * alpha
+        return self.origin + self.directions[self.alive] * radius
+
+    def blits(self, image, alpha=1.0, scale=1.0):
+        pos = self.positions(alpha) * scale
+        # pygame rounds rect centers half away from zero
+        topleft = np.trunc(pos + np.copysign(0.5, pos)).astype(np.int64) - np.array(image.get_size()) // 2
+        return [(image, xy) for xy in topleft.tolist()]
+
+
+class VolleyGroup:
+    """Every volley in flight.
+
+    The bullets of all volleys are swept against the enemy grid together in
+    one SpatialHash.sweep_many call per step.
+    """
+
+    def __init__(self):
+        self.volleys = []
+
+    def __iter__(self):
+        return iter(self.volleys)
+
+    def __len__(self):
+        return len(self.volleys)
+
+    def add(self, volley):
+        self.volleys.append(volley)
+
+    def bullet_count(self):
+        return sum(len(volley) for volley in self.volleys)
+
+    def update(self):
+        self.volleys = [volley for volley in self.volleys if volley.update()]
+
+    def collide(self, grid):
+        """Hits of each bullet that touched a sprite this step, as (sorted (t, sprite) list, distance moved) pairs.
+
+        Bullets that hit are removed from their volley.
+        """
+        if not self.volleys or not len(grid):
+            return []
+        owners, slots, starts, ends = [], [], [], []
+        for volley in self.volleys:
+            index, start, end = volley.paths()
+            owners += [volley] * len(index)
+            slots.append(index)
+            starts.append(start)
+            ends.append(end)
+        slots = np.concatenate(slots)
+        found = grid.sweep_many(np.concatenate(starts), np.concatenate(ends), (PROJECTILE_SIZE, PROJECTILE_SIZE))
+        hits = []
+        for i, bullet_hits in found.items():
+            volley = owners[i]
+            volley.alive[slots[i]] = False
+            hits.append((bullet_hits, volley.radius - volley.prev_radius))
+        return hits
+
+    def blits(self, image, alpha=1.0, scale=1.0):
+        blits = []
+        for volley in self.volleys:
+            blits += volley.blits(image, alpha, scale)
+        return blits
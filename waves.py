@@ -0,0 +1,70 @@
+from collections import deque, namedtuple
+
+import numpy as np
+import pygame
+from constants import *
+from entities import Enemy
+from endless_mode import Boss
+
+# `count` enemies of `kind`, the first `start` ms into the level and then one every `interval` ms
+Wave = namedtuple("Wave", "kind count start interval", defaults=(0, 0))
+
+
+def level_waves(mode, level):
+    """What a level spawns, as a list of Waves."""
+    if mode == ENDLESS and level % 20 == 0:
+        return [Wave(Boss, 1)]
+    return [Wave(Enemy, 5 + level * 3)]
+
+
+def spawn_positions(rng, count, margin=50):
+    """Points just outside the screen edges, like Enemy.get_spawn_pos but for many enemies at once."""
+    sides = rng.integers(0, 4, count) # top, bottom, left, right
+    horizontal = sides < 2
+    extent = np.where(horizontal, WIDTH, HEIGHT)
+    along = np.floor(rng.random(count) * (extent + 2 * margin + 1)) - margin
+    across = np.where(sides % 2 == 0, -margin, np.where(horizontal, HEIGHT, WIDTH) + margin)
+    return np.column_stack((np.where(horizontal, along, across), np.where(horizontal, across, along)))
+
+
+class WaveScheduler:
+    """Spawns a level's enemies over several frames instead of all at once.
+
+    Spawn times and positions for the whole level are worked out up front;
+    update() then creates at most SPAWNS_PER_FRAME of the enemies that are
+    due. The cap is a fixed count rather than a time budget so runs stay
+    reproducible regardless of machine speed.
+    """
+
+    def __init__(self, game):
+        self.game = game
+        self.pending = deque() # (due ms, kind, (x, y)), sorted by due time
+
+    def __len__(self):
+        return len(self.pending)
+
+    def schedule(self, waves):
+        game = self.game
+        total = sum(wave.count for wave in waves)
+        if not total:
+            return
+        rng = np.random.default_rng(game.rng.getrandbits(64))
+        positions = spawn_positions(rng, total).tolist()
+        entries = list(self.pending)
+        for wave in waves:
+            for i in range(wave.count):
+                entries.append((game.ticks + wave.start + i * wave.interval, wave.kind, positions.pop()))
+        entries.sort(key=lambda entry: entry[0])
+        self.pending = deque(entries)
+        self.update()
+
+    def update(self):
+        game = self.game
+        for _ in range(SPAWNS_PER_FRAME):
+            if not self.pending or self.pending[0][0] > game.ticks:
+                break
+            due, kind, pos = self.pending.popleft()
+            game.spawn_enemy(kind(game, game.player, pygame.math.Vector2(pos)))
+
+    def clear(self):
+        self.pending.clear()
@@ -10,7 +10,8 @@ a = Analysis(
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
-    excludes=[],
+    # pygame only falls back to pkg_resources for resources; importing it scans every installed package
+    excludes=['pkg_resources', 'setuptools', 'tkinter'],
     noarchive=False,
     optimize=0,
 )
@@ -25,7 +26,7 @@ exe = EXE(
     debug=False,
     bootloader_ignore_signals=False,
     strip=False,
-    upx=True,
+    upx=False, # UPX-packed libraries are decompressed on every launch
     console=False,
     disable_windowed_traceback=False,
     argv_emulation=False,
@@ -38,7 +39,7 @@ coll = COLLECT(
     a.binaries,
     a.datas,
     strip=False,
-    upx=True,
+    upx=False,
     upx_exclude=[],
     name='肉鸽射击游戏',
 )